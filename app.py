@@ -3,13 +3,11 @@ import streamlit as st
 # Page configuration - MUST be called first before any other Streamlit commands
 st.set_page_config(page_title="💰 Finance Analyzer", layout="wide")
 
-import pandas as pd
 import warnings
 warnings.simplefilter(action='ignore', category=FutureWarning)
-import plotly.graph_objects as go
-import plotly.express as px
 import os
 import hashlib
+import importlib
 import extra_streamlit_components as stx
 from datetime import datetime
 
@@ -72,17 +70,15 @@ if not authenticated:
     # but we don't want to show the app. So we stop here.
     st.stop()
 
-# Import Views
-from views.upload_files import render_upload_files_tab
-from views.file_management import render_file_management_tab
-from views.mapping import render_mapping_tab
-from views.bulk_mapping import render_bulk_mapping_tab
-from views.manual_overwrite import render_manual_overwrite_tab
-from views.non_transaction_accounts import render_non_transaction_accounts_tab
-from views.dashboard import render_dashboard_tab
-from views.dashboard_v1 import render_dashboard_v1_tab
-from views.dashboard_old import render_dashboard_tab_old
-from views.dashboard_v2 import render_dashboard_v2_tab
+# Views are imported lazily: only the page being shown loads its module (and plotly etc.)
+def lazy_view(module_name, func_name):
+    """Return a page callable that imports views.<module_name> on first use."""
+    def render():
+        module = importlib.import_module(f"views.{module_name}")
+        return getattr(module, func_name)()
+    # st.Page infers the page URL from the callable's name; keep it unchanged
+    render.__name__ = func_name
+    return render
 
 # Import Utils
 from utils import (
@@ -90,9 +86,45 @@ from utils import (
     map_transactions,
     synthesize_transactions,
     save_consolidated_data,
-    load_consolidated_data
+    load_consolidated_data,
+    get_stage_fingerprint,
+    get_dataframe_fingerprint,
+    CONSOLIDATED_FILE
 )
 
+# Cached pipeline stages
+# Each stage is keyed on the fingerprint (path, mtime, size) of the files it reads,
+# plus its input dataframe, so button clicks only redo work when something changed.
+# Note: a cache hit skips ingest's update_file_summary side effect. That is safe
+# because the summary content is part of the key: an unchanged summary was already
+# marked Processed by the run that filled the cache.
+@st.cache_data(ttl=3600, show_spinner=False, max_entries=4)
+def cached_ingest_transactions(fingerprint):
+    return ingest_transactions(incremental=True)
+
+# Mapped/synthesized frames are cached as shared resources: no per-call hashing or copying
+# of the dataframe. The leading underscore keeps Streamlit from hashing _df; the cheap
+# get_dataframe_fingerprint(df) stands in for it. Callers must not mutate the result in place.
+@st.cache_resource(ttl=3600, show_spinner=False, max_entries=4)
+def cached_map_transactions(df_fingerprint, fingerprint, _df):
+    return map_transactions(_df.copy())
+
+@st.cache_resource(ttl=3600, show_spinner=False, max_entries=4)
+def cached_synthesize_transactions(df_fingerprint, fingerprint, _df):
+    return synthesize_transactions(_df)
+
+# Keyed on the consolidated file's mtime/size, so a save invalidates it and new sessions
+# (or refreshes within the same file version) are served from memory instead of disk.
+@st.cache_data(show_spinner=False, max_entries=2)
+def cached_load_consolidated_data(fingerprint):
+    return load_consolidated_data()
+
+def run_map_stage(df):
+    return cached_map_transactions(get_dataframe_fingerprint(df), get_stage_fingerprint('map'), df)
+
+def run_synthesize_stage(df):
+    return cached_synthesize_transactions(get_dataframe_fingerprint(df), get_stage_fingerprint('synthesize'), df)
+
 # Initialize session state
 if 'data_refresh_needed' not in st.session_state:
     st.session_state.data_refresh_needed = False
@@ -107,64 +139,76 @@ if 'consolidated_df' not in st.session_state:
 if st.session_state.consolidated_df is None or st.session_state.data_refresh_needed:
     try:
         logger.info("Refresh trigger: no consolidated_df or data_refresh_needed")
-        df = load_consolidated_data()
+        df = cached_load_consolidated_data(get_stage_fingerprint('load'))
         if not df.empty and 'Transaction_Source' in df.columns:
             # We use the file-based transactions as our 'raw' and 'mapped' starting point
             # This avoids re-reading Excel files on every refresh
             st.session_state.consolidated_df = df
-            st.session_state.last_load_timestamp = datetime.fromtimestamp(os.path.getmtime("data/consolidated_transactions.csv"))
+            st.session_state.last_load_timestamp = datetime.fromtimestamp(os.path.getmtime(CONSOLIDATED_FILE))
             st.session_state.data_refresh_needed = False
             logger.info(f"Hydrated {len(df)} transactions from disk.")
     except Exception as e:
         logger.error(f"Could not hydrate from disk: {e}")
 
 # Sidebar - Data Controls
+def run_data_pipeline(reingest, mapping_label="Mapping transactions..."):
+    """
+    Shared body of the Data Controls buttons: ingest (always on reingest, otherwise only
+    if nothing is loaded), then map and synthesize, then save.
+    """
+    if reingest:
+        # Full Reload re-reads every file, bypassing both the app cache and the raw rows cache
+        with st.spinner("Ingesting files..."):
+            st.session_state.consolidated_df = ingest_transactions(incremental=False)
+    elif st.session_state.consolidated_df is None:
+        with st.spinner("Ingesting files (required)..."):
+            st.session_state.consolidated_df = cached_ingest_transactions(get_stage_fingerprint('ingest'))
+    with st.spinner(mapping_label):
+        st.session_state.consolidated_df = run_map_stage(st.session_state.consolidated_df)
+    with st.spinner("Synthesizing data..."):
+        st.session_state.consolidated_df = run_synthesize_stage(st.session_state.consolidated_df)
+    # Saved before the app reruns, so readers of the consolidated file see this run's data
+    with st.spinner("Saving data..."):
+        save_consolidated_data(st.session_state.consolidated_df)
+
+def finish_data_action(message):
+    """Rerun the whole app so the current page picks up the refreshed consolidated_df."""
+    st.session_state.data_controls_message = message
+    st.rerun(scope="app")
+
+# Button clicks only rerun this fragment; the active page re-renders once, after the data changed
+@st.fragment
+def render_data_controls():
+    st.divider()
+    st.subheader("Data Controls")
+
+    # Message from the action that triggered the last app rerun
+    if 'data_controls_message' in st.session_state:
+        st.success(st.session_state.pop('data_controls_message'))
+    
+    # Full Reload
+    if st.button("🔄 Full Reload", help="Reads all files, maps categories, and updates balances.", width="stretch"):
+        run_data_pipeline(reingest=True)
+        st.session_state.last_load_timestamp = datetime.now()
+        st.session_state.data_refresh_needed = False
+        finish_data_action("Full reload complete!")
+        
+    # Refresh Mappings Only
+    if st.button("🏷️ Refresh Mappings", help="Re-applies rules to loaded data. Faster than full reload.", width="stretch"):
+        run_data_pipeline(reingest=False)
+        finish_data_action("Mappings updated!")
+
+    # Refresh Balances Only
+    if st.button("⚖️ Refresh Balances", help="Re-calculates synthetic transactions. Fastest.", width="stretch"):
+        run_data_pipeline(reingest=False, mapping_label="Mapping transactions (required)...")
+        finish_data_action("Balances updated!")
+        
+    if st.session_state.last_load_timestamp:
+        st.caption(f"Last update: {st.session_state.last_load_timestamp.strftime('%H:%M:%S')}")
+
 def render_sidebar_controls():
     with st.sidebar:
-        st.divider()
-        st.subheader("Data Controls")
-        
-        # Full Reload
-        if st.button("🔄 Full Reload", help="Reads all files, maps categories, and updates balances.", width="stretch"):
-            with st.spinner("Ingesting files..."):
-                st.session_state.consolidated_df = ingest_transactions()
-            with st.spinner("Mapping transactions..."):
-                st.session_state.consolidated_df = map_transactions(st.session_state.consolidated_df)
-            with st.spinner("Synthesizing data..."):
-                st.session_state.consolidated_df = synthesize_transactions(st.session_state.consolidated_df)
-                save_consolidated_data(st.session_state.consolidated_df)
-            st.session_state.last_load_timestamp = datetime.now()
-            st.session_state.data_refresh_needed = False
-            st.success("Full reload complete!")
-            
-        # Refresh Mappings Only
-        if st.button("🏷️ Refresh Mappings", help="Re-applies rules to loaded data. Faster than full reload.", width="stretch"):
-            if st.session_state.consolidated_df is None:
-                with st.spinner("Ingesting files (required)..."):
-                    st.session_state.consolidated_df = ingest_transactions()
-            
-            with st.spinner("Mapping transactions..."):
-                st.session_state.consolidated_df = map_transactions(st.session_state.consolidated_df)
-            with st.spinner("Synthesizing data..."):
-                st.session_state.consolidated_df = synthesize_transactions(st.session_state.consolidated_df)
-                save_consolidated_data(st.session_state.consolidated_df)
-            st.success("Mappings updated!")
-
-        # Refresh Balances Only
-        if st.button("⚖️ Refresh Balances", help="Re-calculates synthetic transactions. Fastest.", width="stretch"):
-            if st.session_state.consolidated_df is None:
-                with st.spinner("Ingesting files (required)..."):
-                    st.session_state.consolidated_df = ingest_transactions()
-            with st.spinner("Mapping transactions (required)..."):
-                st.session_state.consolidated_df = map_transactions(st.session_state.consolidated_df)
-            
-            with st.spinner("Synthesizing data..."):
-                st.session_state.consolidated_df = synthesize_transactions(st.session_state.consolidated_df)
-                save_consolidated_data(st.session_state.consolidated_df)
-            st.success("Balances updated!")
-            
-        if st.session_state.last_load_timestamp:
-            st.caption(f"Last update: {st.session_state.last_load_timestamp.strftime('%H:%M:%S')}")
+        render_data_controls()
 
 # --- Navigation Setup ---
 
@@ -206,26 +250,24 @@ def show_home_page():
 home_page = st.Page(show_home_page, title="Home", icon="🏠", default=True)
 
 # Transaction Accounts
-upload_page = st.Page(render_upload_files_tab, title="Upload Files", icon="📥")
-file_mgmt_page = st.Page(render_file_management_tab, title="File Management", icon="📂")
+upload_page = st.Page(lazy_view("upload_files", "render_upload_files_tab"), title="Upload Files", icon="📥")
+file_mgmt_page = st.Page(lazy_view("file_management", "render_file_management_tab"), title="File Management", icon="📂")
 
 # Balance Accounts
-from views.non_transaction_accounts import manage_accounts_page, balance_entries_page
-manage_accts_p = st.Page(manage_accounts_page, title="Manage Accounts", icon="📋")
-balance_entries_p = st.Page(balance_entries_page, title="Balance Entries", icon="⚖️")
+manage_accts_p = st.Page(lazy_view("non_transaction_accounts", "manage_accounts_page"), title="Manage Accounts", icon="📋")
+balance_entries_p = st.Page(lazy_view("non_transaction_accounts", "balance_entries_page"), title="Balance Entries", icon="⚖️")
 
 # Categorization
-mapping_page = st.Page(render_mapping_tab, title="Rules Mapping", icon="🏷️")
-bulk_mapping_page = st.Page(render_bulk_mapping_tab, title="Bulk Mapping", icon="📦")
-manual_overwrite_page = st.Page(render_manual_overwrite_tab, title="Manual Overwrite", icon="✍️")
-from views.mapping_pairs_view import render_mapping_pairs_view
-mapping_pairs_page = st.Page(render_mapping_pairs_view, title="Manage Pairs", icon="🖇️")
+mapping_page = st.Page(lazy_view("mapping", "render_mapping_tab"), title="Rules Mapping", icon="🏷️")
+bulk_mapping_page = st.Page(lazy_view("bulk_mapping", "render_bulk_mapping_tab"), title="Bulk Mapping", icon="📦")
+manual_overwrite_page = st.Page(lazy_view("manual_overwrite", "render_manual_overwrite_tab"), title="Manual Overwrite", icon="✍️")
+mapping_pairs_page = st.Page(lazy_view("mapping_pairs_view", "render_mapping_pairs_view"), title="Manage Pairs", icon="🖇️")
 
 # Analysis
-#dashboard_v1_page = st.Page(render_dashboard_v1_tab, title="Dashboard v1", icon="📉")
-dashboard_v2_page = st.Page(render_dashboard_v2_tab, title="Dashboard v2", icon="📈")
-#dashboard_old_page = st.Page(render_dashboard_tab_old, title="Dashboard Old", icon="📜")
-#dashboard_page = st.Page(render_dashboard_tab, title="Dashboard (alternative)", icon="📊")
+#dashboard_v1_page = st.Page(lazy_view("dashboard_v1", "render_dashboard_v1_tab"), title="Dashboard v1", icon="📉")
+dashboard_v2_page = st.Page(lazy_view("dashboard_v2", "render_dashboard_v2_tab"), title="Dashboard v2", icon="📈")
+#dashboard_old_page = st.Page(lazy_view("dashboard_old", "render_dashboard_tab_old"), title="Dashboard Old", icon="📜")
+#dashboard_page = st.Page(lazy_view("dashboard", "render_dashboard_tab"), title="Dashboard (alternative)", icon="📊")
 
 # Navigation Structure
 pg = st.navigation({
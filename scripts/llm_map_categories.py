@@ -1,29 +1,221 @@
 import pandas as pd
+import numpy as np
 import requests
 import json
+import os
 import time
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from requests.adapters import HTTPAdapter
+
+# Optional embeddings: semantic cache tier (near-duplicate old items reuse an earlier answer)
+# and top-K candidate selection (the prompt only lists the most similar new pairs)
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+# Optional fuzzy prefilter: near-identical pairs are matched without asking the LLM
+try:
+    from rapidfuzz import process, fuzz
+except ImportError:
+    process = fuzz = None
 
 # Configuration
 OLD_CSV_PATH = 'data/old.csv'
 NEW_CSV_PATH = 'data/new.csv'
 OUTPUT_CSV_PATH = 'data/mapped_categories.csv'
+# Typed copy of the output for update_mappings.py; the CSV is kept for review
+OUTPUT_PARQUET_PATH = 'data/mapped_categories.parquet'
+# Each mapped old row is appended here as it completes, so an interrupted run resumes where it stopped.
+# The first line holds the run key (model and new.csv contents) it is valid for; removed once a run completes.
+CHECKPOINT_PATH = 'data/mapped_categories.jsonl'
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL_NAME = "ministral-3:latest"
+# Requests are network-bound, so several are kept in flight at once
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", "8"))
+
+# One keep-alive connection pool shared by all worker threads
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_maxsize=OLLAMA_CONCURRENCY))
+
+# LLM responses are cached on disk, so reruns and repeated items skip the LLM
+LLM_CACHE_PATH = 'data/llm_cache.sqlite'
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+SEMANTIC_CACHE_THRESHOLD = 0.87
+EMBEDDING_TOP_K = 15
+# New pair embeddings persisted across runs; only pairs whose description changed are re-encoded
+NEW_ITEMS_CACHE_PATH = 'data/new_items_cache.parquet'
+
+# Ollama structured output: the response is constrained to this JSON schema
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "match_found": {"type": "boolean"},
+        "new_pair_id": {"type": ["integer", "null"]},
+        "reasoning": {"type": "string"}
+    },
+    "required": ["match_found", "new_pair_id"]
+}
+
+# Fuzzy prefilter thresholds (rapidfuzz token_set_ratio, 0-100)
+FUZZY_ACCEPT_SCORE = 90       # at or above: accept the best new pair directly
+FUZZY_CANDIDATES_SCORE = 75   # between the two: ask the LLM, but only about the top candidates
+FUZZY_TOP_K = 15
+
+_cache_lock = threading.Lock()
+_cache_conn = None
+_embedding_model = None
+# candidate universe key -> (normalized embeddings matrix, cached responses)
+_semantic_index = {}
 
 def load_data():
     """Loads old and new CSV files."""
     try:
-        old_df = pd.read_csv(OLD_CSV_PATH)
-        new_df = pd.read_csv(NEW_CSV_PATH)
+        old_df = pd.read_csv(OLD_CSV_PATH, engine='pyarrow')
+        new_df = pd.read_csv(NEW_CSV_PATH, engine='pyarrow')
         return old_df, new_df
     except FileNotFoundError as e:
         print(f"Error loading files: {e}")
         exit(1)
 
-def format_category_pair(row):
-    """Formats a row into a string 'Category - Sub-Category (Direction)'."""
-    return f"{row['Category']} - {row['Sub-Category']} ({row['Direction']})"
+def get_run_key():
+    """Identifies what a checkpoint is valid for: the model and the contents of new.csv."""
+    with open(NEW_CSV_PATH, 'rb') as f:
+        return hashlib.sha1(MODEL_NAME.encode() + b'|' + f.read()).hexdigest()
+
+def _read_checkpoint(run_key):
+    """Returns the records of the checkpoint, or None if there is none or it was written for another run key."""
+    if not os.path.exists(CHECKPOINT_PATH):
+        return None
+    with open(CHECKPOINT_PATH) as f:
+        lines = [line for line in f if line.strip()]
+    if not lines or json.loads(lines[0]).get("run_key") != run_key:
+        return None
+    return [json.loads(line) for line in lines[1:]]
+
+def _old_row_key(pair_id, category, sub_category, direction):
+    return tuple(str(value) for value in (pair_id, category, sub_category, direction))
 
+def load_checkpoint(old_df, run_key):
+    """
+    Loads the mapped rows saved by previous runs with the same run key,
+    keeping only those whose old row is still in old.csv unchanged.
+    """
+    records = _read_checkpoint(run_key) or []
+    old_rows = set(map(_old_row_key, old_df['Pair_ID'], old_df['Category'], old_df['Sub-Category'], old_df['Direction']))
+    return [record for record in records
+            if _old_row_key(record["Old_id"], record["old_category"], record["old_subcategory"], record["old_directrion"]) in old_rows]
+
+def open_checkpoint(run_key):
+    """Opens the checkpoint for appending, starting a new one if it belongs to another run key."""
+    if _read_checkpoint(run_key) is not None:
+        return open(CHECKPOINT_PATH, 'a')
+    checkpoint = open(CHECKPOINT_PATH, 'w')
+    checkpoint.write(json.dumps({"run_key": run_key}) + "\n")
+    return checkpoint
+
+def _json_default(value):
+    """Lets json.dumps write numpy scalars coming from the dataframes."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def format_category_pairs(df):
+    """Formats each row into a string 'Category - Sub-Category (Direction)', as a Series."""
+    return (df['Category'].astype(str) + ' - ' + df['Sub-Category'].astype(str)
+            + ' (' + df['Direction'].astype(str) + ')')
+
+def _get_cache_conn():
+    """Opens the sqlite response cache on first use. Callers must hold _cache_lock."""
+    global _cache_conn
+    if _cache_conn is None:
+        _cache_conn = sqlite3.connect(LLM_CACHE_PATH, check_same_thread=False)
+        _cache_conn.execute("CREATE TABLE IF NOT EXISTS cache(key TEXT PRIMARY KEY, val TEXT)")
+        _cache_conn.execute("CREATE TABLE IF NOT EXISTS semantic_cache(candidates TEXT, emb BLOB, val TEXT)")
+    return _cache_conn
+
+_model_lock = threading.Lock()
+
+def _get_embedding_model():
+    """Loads the sentence embedding model on first use; None if sentence-transformers is not installed."""
+    global _embedding_model
+    with _model_lock:
+        if _embedding_model is None and SentenceTransformer is not None:
+            _embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return _embedding_model
+
+def _get_semantic_index(conn, universe_key):
+    """Returns the (embeddings, responses) cached for one candidate universe, loading them from disk once."""
+    if universe_key not in _semantic_index:
+        rows = conn.execute("SELECT emb, val FROM semantic_cache WHERE candidates = ?", (universe_key,)).fetchall()
+        embeddings = np.array([np.frombuffer(emb, dtype=np.float32) for emb, _ in rows], dtype=np.float32)
+        _semantic_index[universe_key] = (embeddings, [val for _, val in rows])
+    return _semantic_index[universe_key]
+
+def _answer_in_candidates(content, new_items_dict):
+    """Whether a cached response is a valid answer for this candidate list: no match, or one of its ids."""
+    pair_id = content.get("new_pair_id")
+    return pair_id is None or str(pair_id).strip() in {str(pid) for pid in new_items_dict}
+
+def cached_llm_mapping(func):
+    """
+    Two-tier cache around get_llm_mapping, persisted in LLM_CACHE_PATH.
+    Exact tier: keyed on model, old item and candidate list.
+    Semantic tier (if sentence-transformers is installed): keyed on model and the full set of new
+    pairs (candidate_universe, the candidate list itself if not given), since the per-item top-K
+    candidate lists rarely repeat. Reuses the response of the most similar old item seen, when
+    cosine similarity >= SEMANTIC_CACHE_THRESHOLD and its answer is among the current candidates.
+    Failed calls (None) are not cached.
+    """
+    @wraps(func)
+    def wrapper(old_item_str, new_items_dict, candidate_universe=None):
+        candidates = json.dumps(sorted(new_items_dict.items()), default=str)
+        key = hashlib.sha1(f"{MODEL_NAME}|{old_item_str}|{candidates}".encode()).hexdigest()
+        universe = candidates if candidate_universe is None else json.dumps(sorted(candidate_universe.items()), default=str)
+        universe_key = hashlib.sha1(f"{MODEL_NAME}|{universe}".encode()).hexdigest()
+
+        with _cache_lock:
+            row = _get_cache_conn().execute("SELECT val FROM cache WHERE key = ?", (key,)).fetchone()
+        if row:
+            return json.loads(row[0])
+
+        # Encoded outside the lock, so worker threads embed concurrently
+        model = _get_embedding_model()
+        query_emb = None
+        if model is not None:
+            query_emb = np.asarray(model.encode(old_item_str, normalize_embeddings=True), dtype=np.float32)
+            with _cache_lock:
+                embeddings, values = _get_semantic_index(_get_cache_conn(), universe_key)
+            if len(values):
+                scores = embeddings @ query_emb
+                best = int(np.argmax(scores))
+                if scores[best] >= SEMANTIC_CACHE_THRESHOLD:
+                    content = json.loads(values[best])
+                    if _answer_in_candidates(content, new_items_dict):
+                        return content
+
+        content = func(old_item_str, new_items_dict)
+        if content is None:
+            return None
+
+        val = json.dumps(content)
+        with _cache_lock:
+            conn = _get_cache_conn()
+            conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?)", (key, val))
+            if query_emb is not None:
+                conn.execute("INSERT INTO semantic_cache VALUES (?, ?, ?)", (universe_key, query_emb.tobytes(), val))
+                embeddings, values = _get_semantic_index(conn, universe_key)
+                embeddings = np.vstack([embeddings.reshape(-1, query_emb.size), query_emb])
+                _semantic_index[universe_key] = (embeddings, values + [val])
+            conn.commit()
+        return content
+    return wrapper
+
+@cached_llm_mapping
 def get_llm_mapping(old_item_str, new_items_dict):
     """
     Asks the LLM to map the old item to one of the new items.
@@ -45,25 +237,18 @@ Instructions:
 1. Analyze the meaning of the Old Category Pair.
 2. Select the most appropriate New Category Pair from the list based on semantic similarity and financial purpose.
 3. If no existing pair fits well, you may propose a mapping, but PREFER existing items.
-4. Output specific JSON only.
-
-Output JSON format:
-{{
-  "match_found": true/false,
-  "new_pair_id": <ID from list if found, else null>,
-  "reasoning": "short explanation"
-}}
+4. Set new_pair_id to the ID from the list if found, else null, with a short reasoning.
     """
 
     data = {
         "model": MODEL_NAME,
         "prompt": prompt,
         "stream": False,
-         "format": "json"
+        "format": RESPONSE_SCHEMA
     }
 
     try:
-        response = requests.post(OLLAMA_URL, json=data)
+        response = session.post(OLLAMA_URL, json=data)
         response.raise_for_status()
         result = response.json()
         content = json.loads(result['response'])
@@ -72,28 +257,111 @@ Output JSON format:
         print(f"Error communicating with LLM: {e}")
         return None
 
+def fuzzy_prefilter(old_item_str, new_items_dict):
+    """
+    Scores the old item against every new pair.
+    Returns (pair_id, candidates): pair_id is set when the best score is high enough to skip the LLM;
+    otherwise candidates is the dict of new pairs to send to the LLM (narrowed to the top-K
+    when the best match is close but ambiguous).
+    """
+    if process is None:
+        return None, new_items_dict
+    matches = process.extract(old_item_str, new_items_dict, scorer=fuzz.token_set_ratio, limit=FUZZY_TOP_K)
+    if not matches:
+        return None, new_items_dict
+    best_score, best_id = matches[0][1], matches[0][2]
+    if best_score >= FUZZY_ACCEPT_SCORE:
+        return best_id, None
+    if best_score >= FUZZY_CANDIDATES_SCORE:
+        return None, {pid: desc for desc, _, pid in matches}
+    return None, new_items_dict
+
+def embed_candidates(new_items_dict):
+    """
+    Embeds the new pair descriptions, reusing the embeddings stored in NEW_ITEMS_CACHE_PATH
+    for descriptions that haven't changed. None if sentence-transformers is not installed.
+    """
+    model = _get_embedding_model()
+    if model is None:
+        return None
+
+    descs = list(new_items_dict.values())
+    hashes = [hashlib.sha1(f"{EMBEDDING_MODEL_NAME}|{desc}".encode()).hexdigest() for desc in descs]
+    cached = {}
+    if os.path.exists(NEW_ITEMS_CACHE_PATH):
+        cache_df = pd.read_parquet(NEW_ITEMS_CACHE_PATH, columns=['hash', 'emb'])
+        cached = dict(zip(cache_df['hash'], cache_df['emb']))
+
+    missing = [i for i, h in enumerate(hashes) if h not in cached]
+    if missing:
+        encoded = model.encode([descs[i] for i in missing], normalize_embeddings=True)
+        for i, emb in zip(missing, encoded):
+            cached[hashes[i]] = np.asarray(emb, dtype=np.float32).tobytes()
+
+    embeddings = [cached[h] for h in hashes]
+    if missing or len(cached) != len(set(hashes)):
+        pd.DataFrame({
+            'Pair_ID': list(new_items_dict.keys()),
+            'desc': descs,
+            'hash': hashes,
+            'emb': embeddings
+        }).to_parquet(NEW_ITEMS_CACHE_PATH, engine='pyarrow', index=False)
+    return np.vstack([np.frombuffer(emb, dtype=np.float32) for emb in embeddings])
+
+def top_k_candidates(old_item_str, new_items_dict, candidate_embeddings, k=EMBEDDING_TOP_K):
+    """
+    Narrows the new pairs sent to the LLM to the k most similar to the old item (cosine similarity),
+    keeping their Pair_IDs so the LLM's answer stays valid. Returns the dict unchanged without embeddings.
+    """
+    if candidate_embeddings is None or len(new_items_dict) <= k:
+        return new_items_dict
+    query_emb = _get_embedding_model().encode(old_item_str, normalize_embeddings=True)
+    scores = candidate_embeddings @ np.asarray(query_emb, dtype=np.float32)
+    top = np.sort(np.argpartition(-scores, k)[:k])
+    items = list(new_items_dict.items())
+    return dict(items[i] for i in top)
+
+def map_old_item(old_item_str, new_items_dict, candidate_embeddings=None):
+    """Maps one old item: fuzzy prefilter first, LLM only for what it can't settle."""
+    pair_id, candidates = fuzzy_prefilter(old_item_str, new_items_dict)
+    if pair_id is not None:
+        return {"match_found": True, "new_pair_id": pair_id, "reasoning": "fuzzy match"}
+    if candidates is new_items_dict:
+        candidates = top_k_candidates(old_item_str, new_items_dict, candidate_embeddings)
+    return get_llm_mapping(old_item_str, candidates, candidate_universe=new_items_dict)
+
 def main():
     print("Loading data...")
     old_df, new_df = load_data()
     
     # Pre-process new categories for the prompt
     # dictionary: Pair_ID -> Description String
-    new_items_dict = {}
-    for _, row in new_df.iterrows():
-        new_items_dict[row['Pair_ID']] = format_category_pair(row)
+    new_items_dict = dict(zip(new_df['Pair_ID'], format_category_pairs(new_df)))
+    # Pair_ID -> row, for O(1) lookups of the LLM's answer (first row wins on duplicate ids)
+    new_by_id = (new_df.drop_duplicates('Pair_ID').set_index('Pair_ID')[['Category', 'Sub-Category', 'Direction']]
+                 .to_dict('index'))
 
-    mapped_rows = []
-    matched_new_ids = set()
+    run_key = get_run_key()
+    done_rows = load_checkpoint(old_df, run_key)
+    done_ids = {record["Old_id"] for record in done_rows}
+    matched_new_ids = {record["new_id"] for record in done_rows if record["new_id"] is not None}
+    pending_df = old_df[~old_df['Pair_ID'].isin(done_ids)]
 
-    print(f"Processing {len(old_df)} records...")
+    print(f"Processing {len(pending_df)} records ({len(done_ids)} already done in {CHECKPOINT_PATH})...")
     
+    old_item_strs = format_category_pairs(pending_df).tolist()
+    candidate_embeddings = embed_candidates(new_items_dict) if len(pending_df) else None
+    executor = ThreadPoolExecutor(max_workers=OLLAMA_CONCURRENCY)
+    checkpoint = open_checkpoint(run_key)
+    completed = False
     try:
-        for index, old_row in old_df.iterrows():
-            old_item_str = format_category_pair(old_row)
+        # map() yields responses in input order, so rows are still processed sequentially below
+        llm_responses = executor.map(
+            partial(map_old_item, new_items_dict=new_items_dict, candidate_embeddings=candidate_embeddings),
+            old_item_strs)
+        for old_row, old_item_str, llm_response in zip(pending_df.to_dict('records'), old_item_strs, llm_responses):
             print(f"Mapping: {old_item_str}...")
             
-            llm_response = get_llm_mapping(old_item_str, new_items_dict)
-            
             new_id = None
             new_cat = None
             new_sub = None
@@ -114,19 +382,19 @@ def main():
                         new_id = str(potential_id).strip()
 
                     # Find the row in new_df
-                    match_row = new_df[new_df['Pair_ID'] == new_id]
+                    match_row = new_by_id.get(new_id)
                     
-                    if not match_row.empty:
-                        new_cat = match_row.iloc[0]['Category']
-                        new_sub = match_row.iloc[0]['Sub-Category']
-                        new_dir = match_row.iloc[0]['Direction']
+                    if match_row is not None:
+                        new_cat = match_row['Category']
+                        new_sub = match_row['Sub-Category']
+                        new_dir = match_row['Direction']
                         matched_new_ids.add(new_id)
                     else:
                         print(f"  Warning: LLM returned ID {new_id} not found in new.csv")
                 except ValueError:
                      print(f"  Warning: Could not parse ID {llm_response['new_pair_id']}")
             
-            mapped_rows.append({
+            record = {
                 "Old_id": old_row['Pair_ID'],
                 "old_category": old_row['Category'],
                 "old_subcategory": old_row['Sub-Category'],
@@ -135,25 +403,35 @@ def main():
                 "new_category": new_cat,
                 "new_subcategory": new_sub,
                 "new_direction": new_dir
-            })
+            }
+            checkpoint.write(json.dumps(record, default=_json_default) + "\n")
+            checkpoint.flush()
+        completed = True
     except KeyboardInterrupt:
         print("\nProcess interrupted by user. Saving partial progress...")
     except Exception as e:
         print(f"\nAn error occurred: {e}. Saving partial progress...")
+    finally:
+        # Drop queued requests instead of waiting for them on interrupt
+        executor.shutdown(wait=False, cancel_futures=True)
+        checkpoint.close()
         
     print("Processing unmatched new items...")
     # Identify pairs from new.csv that were not mapped
-    all_new_ids = set(new_df['Pair_ID'].tolist())
-    unmatched_ids = all_new_ids - matched_new_ids
+    all_new_ids = new_df['Pair_ID'].to_numpy()
+    matched_arr = np.array(list(matched_new_ids), dtype=all_new_ids.dtype)
+    unmatched_ids = np.setdiff1d(all_new_ids, matched_arr)
     
+    # The mapped rows (this run and previous ones) are read back from the checkpoint once
+    mapped_rows = load_checkpoint(old_df, run_key)
     for unmatched_id in unmatched_ids:
-        row = new_df[new_df['Pair_ID'] == unmatched_id].iloc[0]
+        row = new_by_id[unmatched_id]
         mapped_rows.append({
             "Old_id": None,
             "old_category": None,
             "old_subcategory": None,
             "old_directrion": None,
-            "new_id": row['Pair_ID'],
+            "new_id": unmatched_id,
             "new_category": row['Category'],
             "new_subcategory": row['Sub-Category'],
             "new_direction": row['Direction']
@@ -165,6 +443,14 @@ def main():
     # Save
     print(f"Saving to {OUTPUT_CSV_PATH}...")
     output_df.to_csv(OUTPUT_CSV_PATH, index=False)
+    # Nullable integer ids, so rows without an old/new id don't turn the ids into floats
+    for col in ['Old_id', 'new_id']:
+        if pd.api.types.is_numeric_dtype(output_df[col]):
+            output_df[col] = output_df[col].astype('Int64')
+    output_df.to_parquet(OUTPUT_PARQUET_PATH, engine='pyarrow', compression='zstd', index=False)
+    if completed:
+        # Every old row is in the output now; an interrupted run keeps its checkpoint to resume from
+        os.remove(CHECKPOINT_PATH)
     print("Done.")
 
 if __name__ == "__main__":
@@ -15,7 +15,7 @@ def migrate():
     shutil.copy(MAPPING_RULES_FILE, BACKUP_FILE)
     print(f"Backed up {MAPPING_RULES_FILE} to {BACKUP_FILE}")
 
-    df = pd.read_csv(MAPPING_RULES_FILE, keep_default_na=False, na_values=['NaN'])
+    df = pd.read_csv(MAPPING_RULES_FILE, keep_default_na=False, na_values=['NaN'], engine='pyarrow')
     
     # Ensure columns exist
     required_cols = ['Category', 'Sub-Category', 'Direction']
@@ -23,24 +23,24 @@ def migrate():
         if col not in df.columns:
             df[col] = ''
 
-    # Extract unique pairs
-    pairs = df[required_cols].drop_duplicates().reset_index(drop=True)
-    pairs['Pair_ID'] = pairs.index + 1
+    # Number the unique pairs in order of first appearance with a single hash pass
+    # over a composite key, so no merge is needed to put Pair_ID back on the rules
+    key = (df['Category'].astype(str) + '\x1f' + df['Sub-Category'].astype(str)
+           + '\x1f' + df['Direction'].astype(str))
+    codes, _ = pd.factorize(key, sort=False)
+    df['Pair_ID'] = codes + 1
     
     # Save pairs
-    pairs = pairs[['Pair_ID', 'Category', 'Sub-Category', 'Direction']]
+    pairs = df[['Pair_ID', 'Category', 'Sub-Category', 'Direction']].drop_duplicates('Pair_ID').sort_values('Pair_ID')
     pairs.to_csv(MAPPING_PAIRS_FILE, index=False)
     print(f"Created {MAPPING_PAIRS_FILE} with {len(pairs)} pairs.")
 
-    # Merge back to get Pair_ID in rules
-    merged = pd.merge(df, pairs, on=['Category', 'Sub-Category', 'Direction'], how='left')
-    
     # Select columns for new rules file
     new_rules_cols = ['Rule_ID', 'Pattern', 'Pair_ID', 'Priority', 'Is_Wildcard']
     # Ensure other columns are kept if they exist (though we are refactoring, let's stick to the plan)
     # The plan says: Rule_ID, Pattern, Pair_ID, Priority, Is_Wildcard
     
-    new_rules = merged[new_rules_cols]
+    new_rules = df[new_rules_cols]
     new_rules.to_csv(MAPPING_RULES_FILE, index=False)
     print(f"Updated {MAPPING_RULES_FILE} with Pair_ID.")
 
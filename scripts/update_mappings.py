@@ -1,36 +1,41 @@
 import pandas as pd
+import numpy as np
 import os
 
 def main():
     # File paths
     base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     mapped_categories_path = os.path.join(base_dir, 'data', 'mapped_categories.csv')
+    mapped_categories_parquet_path = os.path.join(base_dir, 'data', 'mapped_categories.parquet')
     mapping_rules_path = os.path.join(base_dir, 'data', 'mapping_rules.csv')
     mapping_pairs_path = os.path.join(base_dir, 'data', 'mapping_pairs.csv')
 
-    # Read mapped_categories.csv
-    # Default pandas behavior handles standard None/NaN values correctly
-    df_mapped = pd.read_csv(mapped_categories_path,keep_default_na=False,na_values=['NaN'])
+    # Read mapped categories, preferring the typed Parquet copy written by llm_map_categories.py
+    # unless the CSV was edited after it
+    # Ids are read as nullable integers: empty cells become NA (and '1.0' becomes 1)
+    if (os.path.exists(mapped_categories_parquet_path) and
+            os.path.getmtime(mapped_categories_parquet_path) >= os.path.getmtime(mapped_categories_path)):
+        df_mapped = pd.read_parquet(mapped_categories_parquet_path, engine='pyarrow').astype(
+            {'Old_id': 'Int64', 'new_id': 'Int64'})
+    else:
+        df_mapped = pd.read_csv(mapped_categories_path,keep_default_na=False,na_values=['NaN', ''],
+                                dtype={'Old_id': 'Int64', 'new_id': 'Int64'},engine='pyarrow')
 
     # ---------------------------------------------------------
     # Task A: Update mapping_rules.csv IDs
     # ---------------------------------------------------------
     
-    # 1) Identify rows where Old_id is not null or empty string
-    # Ensure Old_id is treated as numeric/object that can be NaN, dropna removes NaNs
-    # With keep_default_na=False, we must also filter out empty strings
-    updates = df_mapped[df_mapped['Old_id'].notna() & (df_mapped['Old_id'] != '')].copy()
+    # 1) Identify rows where Old_id is not null (empty cells were read as NA)
+    updates = df_mapped.loc[df_mapped['Old_id'].notna(), ['Old_id', 'new_id']]
     
     if not updates.empty:
         # Create a dictionary for mapping: Old_id -> New_id
-        # Ensure IDs are integers for robust matching if they look like floats (e.g. 1.0)
+        # astype(np.int64) fails on an old id left without a new id, which aborts the update
         try:
-            updates['Old_id'] = updates['Old_id'].astype(float).astype(int)
-            updates['new_id'] = updates['new_id'].astype(float).astype(int)
-            id_map = dict(zip(updates['Old_id'], updates['new_id']))
+            id_map = dict(zip(updates['Old_id'].astype(np.int64).to_numpy(), updates['new_id'].astype(np.int64).to_numpy()))
             
             # Read mapping_rules.csv
-            df_rules = pd.read_csv(mapping_rules_path,keep_default_na=False,na_values=['NaN'])
+            df_rules = pd.read_csv(mapping_rules_path,keep_default_na=False,na_values=['NaN'],engine='pyarrow')
             
             # 2 & 3) Find rows in mapping_rules using old pair id and replace with new pair id
             # We map Pair_ID using the id_map. If not found in map, keep original.
@@ -42,12 +47,11 @@ def main():
                  df_rules['Pair_ID'] = df_rules['Pair_ID'].fillna(-1).astype(int)
 
             # Apply mapping
-            # map() with fillna won't work easily if we want to keep original values that aren't in the map
-            # replace() is better suited
-            df_rules['Pair_ID'] = df_rules['Pair_ID'].replace(id_map)
+            # map() is a single hash lookup per value; ids not in the map keep their original value
+            mapped = df_rules['Pair_ID'].map(id_map)
             
             # Ensure Pair_ID is exported as integer (no decimals)
-            df_rules['Pair_ID'] = df_rules['Pair_ID'].astype(int)
+            df_rules['Pair_ID'] = mapped.where(mapped.notna(), df_rules['Pair_ID']).astype(np.int64)
             
             # Write back to mapping_rules.csv
             df_rules.to_csv(mapping_rules_path, index=False)
@@ -79,7 +83,7 @@ def main():
     df_pairs_new = df_pairs_new.dropna(subset=['Pair_ID'])
     
     # 2) Sort rows by id
-    df_pairs_new['Pair_ID'] = df_pairs_new['Pair_ID'].astype(float).astype(int)
+    df_pairs_new['Pair_ID'] = df_pairs_new['Pair_ID'].astype(np.int64)
     df_pairs_new = df_pairs_new.sort_values(by='Pair_ID')
     
     # 3) Overwrite content of mapping_pairs.csv
@@ -0,0 +1,43 @@
+import sys
+import os
+import time
+import tempfile
+
+# Add project root to path
+sys.path.append(os.getcwd())
+
+from utils.file_management import get_files_fingerprint
+
+def verify():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        raw_dir = os.path.join(tmp_dir, "raw_files")
+        os.makedirs(raw_dir)
+        file_path = os.path.join(raw_dir, "statement.xlsx")
+        with open(file_path, "w") as f:
+            f.write("v1")
+        missing_path = os.path.join(tmp_dir, "does_not_exist.csv")
+
+        print("Verifying missing paths are skipped...")
+        before = get_files_fingerprint([raw_dir, missing_path])
+        if len(before) != 1 or before[0][0] != file_path:
+            print(f"FAIL: Unexpected fingerprint entries: {before}")
+            return
+        print("OK")
+
+        print("\nVerifying fingerprint changes when a raw file is touched...")
+        new_mtime = os.path.getmtime(file_path) + 10
+        os.utime(file_path, (time.time(), new_mtime))
+        after = get_files_fingerprint([raw_dir, missing_path])
+        if after == before:
+            print("FAIL: Fingerprint did not change after touching the file.")
+            return
+        print("OK")
+
+        print("\nVerifying fingerprint is stable when nothing changes...")
+        if get_files_fingerprint([raw_dir, missing_path]) != after:
+            print("FAIL: Fingerprint changed without any file change.")
+            return
+        print("OK")
+
+if __name__ == "__main__":
+    verify()
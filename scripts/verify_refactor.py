@@ -5,7 +5,7 @@ import pandas as pd
 # Add project root to path
 sys.path.append(os.getcwd())
 
-from utils.categorization import load_mapping_rules, add_mapping_rule
+from utils.categorization import load_mapping_rules, add_mapping_rules_bulk, delete_mapping_rules_bulk
 
 def verify():
     print("Verifying load_mapping_rules...")
@@ -20,31 +20,29 @@ def verify():
     print("Sample rule:")
     print(rules.iloc[0].to_dict())
 
-    print("\nVerifying add_mapping_rule...")
-    # Try adding a rule with an existing pair
+    print("\nVerifying add_mapping_rules_bulk...")
+    # Add a rule with an existing pair and a rule with a NEW pair in one write
     existing_rule = rules.iloc[0]
     cat = existing_rule['Category']
     sub = existing_rule['Sub-Category']
     direction = existing_rule['Direction']
     
     new_pattern = "TEST_PATTERN_EXISTING_PAIR"
-    try:
-        new_id = add_mapping_rule(new_pattern, cat, sub, direction)
-        print(f"Added rule {new_id} with existing pair.")
-    except Exception as e:
-        print(f"FAIL: Failed to add rule with existing pair: {e}")
-
-    # Try adding a rule with a NEW pair
     new_pattern_2 = "TEST_PATTERN_NEW_PAIR"
     new_cat = "NewCategory"
     new_sub = "NewSubCategory"
     new_dir = "Out"
     
+    new_ids = []
     try:
-        new_id_2 = add_mapping_rule(new_pattern_2, new_cat, new_sub, new_dir)
-        print(f"Added rule {new_id_2} with NEW pair.")
+        new_ids = add_mapping_rules_bulk([
+            (new_pattern, cat, sub, direction),
+            (new_pattern_2, new_cat, new_sub, new_dir),
+        ])
+        print(f"Added rule {new_ids[0]} with existing pair.")
+        print(f"Added rule {new_ids[1]} with NEW pair.")
     except Exception as e:
-        print(f"FAIL: Failed to add rule with new pair: {e}")
+        print(f"FAIL: Failed to add rules: {e}")
 
     # Verify persistence
     rules_reloaded = load_mapping_rules()
@@ -62,9 +60,7 @@ def verify():
         print("FAIL: Rule 2 not found.")
 
     # Cleanup
-    from utils.categorization import delete_mapping_rule
-    if 'new_id' in locals(): delete_mapping_rule(new_id)
-    if 'new_id_2' in locals(): delete_mapping_rule(new_id_2)
+    delete_mapping_rules_bulk(new_ids)
     print("Cleanup done.")
 
 if __name__ == "__main__":
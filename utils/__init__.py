@@ -10,72 +10,85 @@ Modules:
 - manual_overrides: Manual override management
 """
 
-# Core utilities
-from .transaction_keys import create_transaction_key
-from .logger import get_logger
+import importlib
 
-# File management
-from .file_management import (
-    parse_excel_file,
-    load_consolidated_data,
-    save_consolidated_data,
-    get_uploaded_files_info,
-    delete_uploaded_file,
-    read_bank_mapping,
-    update_file_summary,
-    get_transaction_capable_banks,
-    get_accounts_for_bank,
-    RAW_FILES_DIR,
-    CONSOLIDATED_FILE,
-    DATA_DIR,
-)
+# Exports are imported from their module on first access (PEP 562), so importing one
+# utility, e.g. from a short-lived script, doesn't load every module and its dependencies.
+_LAZY_EXPORTS = {
+    # Core utilities
+    'create_transaction_key': 'transaction_keys',
+    'create_transaction_keys': 'transaction_keys',
+    'get_logger': 'logger',
 
-# File detection
-from .file_detection import (
-    detect_bank_account_pair,
-    detect_all_files,
-    get_module_signature_info,
-)
+    # File management
+    'parse_excel_file': 'file_management',
+    'load_consolidated_data': 'file_management',
+    'save_consolidated_data': 'file_management',
+    'get_uploaded_files_info': 'file_management',
+    'delete_uploaded_file': 'file_management',
+    'read_bank_mapping': 'file_management',
+    'update_file_summary': 'file_management',
+    'get_transaction_capable_banks': 'file_management',
+    'get_accounts_for_bank': 'file_management',
+    'RAW_FILES_DIR': 'file_management',
+    'CONSOLIDATED_FILE': 'file_management',
+    'DATA_DIR': 'file_management',
+
+    # File detection
+    'detect_bank_account_pair': 'file_detection',
+    'detect_all_files': 'file_detection',
+    'get_module_signature_info': 'file_detection',
 
-# Constants
-from .categorization import MAPPING_RULES_FILE
+    # Constants
+    'MAPPING_RULES_FILE': 'categorization',
 
-# Categorization and rules
-from .categorization import (
-    match_pattern,
-#    validate_pattern,
-    load_mapping_rules,
-    apply_categorization,
-    add_mapping_rule,
-    delete_mapping_rule,
-    test_rule,
-    get_category_subcategory_combinations,
-    get_subcategories_for_category,
-    get_direction_for_subcategory,
-    get_flat_mapping_options,
-    apply_new_rules_list_to_consolidated_data
-)
+    # Categorization and rules
+    'match_pattern': 'categorization',
+#    'validate_pattern': 'categorization',
+    'load_mapping_rules': 'categorization',
+    'apply_categorization': 'categorization',
+    'apply_categorization_pl': 'categorization',
+    'add_mapping_rule': 'categorization',
+    'add_mapping_rules_bulk': 'categorization',
+    'delete_mapping_rule': 'categorization',
+    'delete_mapping_rules_bulk': 'categorization',
+    'test_rule': 'categorization',
+    'get_category_subcategory_combinations': 'categorization',
+    'get_subcategories_for_category': 'categorization',
+    'get_direction_for_subcategory': 'categorization',
+    'get_flat_mapping_options': 'categorization',
+    'apply_new_rules_list_to_consolidated_data': 'categorization',
 
-# Consolidation
-from .consolidation import (
-    ingest_transactions,
-    map_transactions,
-    synthesize_transactions,
-    extract_distinct_uncategorized_transactions)
+    # Consolidation
+    'ingest_transactions': 'consolidation',
+    'map_transactions': 'consolidation',
+    'synthesize_transactions': 'consolidation',
+    'get_stage_fingerprint': 'consolidation',
+    'get_dataframe_fingerprint': 'consolidation',
+    'extract_distinct_uncategorized_transactions': 'consolidation',
+
+    # Manual overrides
+    'load_manual_overwrites': 'manual_overrides',
+    'add_manual_override': 'manual_overrides',
+    'remove_manual_override': 'manual_overrides',
+    'load_amount_overwrites': 'manual_overrides',
+    'add_amount_override': 'manual_overrides',
+    'remove_amount_override': 'manual_overrides',
+}
 
-# Manual overrides
-from .manual_overrides import (
-    load_manual_overwrites,
-    add_manual_override,
-    remove_manual_override,
-    load_amount_overwrites,
-    add_amount_override,
-    remove_amount_override,
-)
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__)
+        value = getattr(module, name)
+        # Cache on the package so later lookups skip __getattr__
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     # Transaction keys
     'create_transaction_key',
+    'create_transaction_keys',
     # Logger
     'get_logger',
     # File management
@@ -97,10 +110,15 @@ __all__ = [
 #    'validate_pattern',
     'load_mapping_rules',
     'apply_categorization',
+    'apply_categorization_pl',
     'add_mapping_rule',
+    'add_mapping_rules_bulk',
     'delete_mapping_rule',
+    'delete_mapping_rules_bulk',
     'test_rule',
     # Consolidation
+    'get_stage_fingerprint',
+    'get_dataframe_fingerprint',
     'extract_distinct_uncategorized_transactions',
     # Manual overrides
     'load_manual_overwrites',
@@ -7,10 +7,10 @@ import re
 import pandas as pd
 import polars as pl
 import os
-from .transaction_keys import create_transaction_key
+from .transaction_keys import create_transaction_keys
 from .logger import get_logger
-from .file_management import load_consolidated_data, save_consolidated_data
-from .manual_overrides import load_manual_overwrites, load_amount_overwrites
+from .file_management import load_consolidated_data, save_consolidated_data, get_files_fingerprint
+from .manual_overrides import load_manual_overwrites_pl, load_amount_overwrites_pl, manual_overwrites_to_pl
 from .file_management import load_consolidated_data
 
 logger = get_logger()
@@ -18,6 +18,23 @@ logger = get_logger()
 MAPPING_RULES_FILE = os.path.join("data", "mapping_rules.csv")
 MAPPING_PAIRS_FILE = os.path.join("data", "mapping_pairs.csv")
 
+# Parsed rules and the lookups derived from them, reused until either mapping file changes.
+# Keyed on the (path, mtime, size) fingerprint of both files; writers below also clear it.
+_rules_cache = {}
+
+
+def _get_rules_cache():
+    """Return the cache entry for the current mapping files, resetting it if they changed on disk."""
+    key = get_files_fingerprint([MAPPING_RULES_FILE, MAPPING_PAIRS_FILE])
+    if _rules_cache.get('key') != key:
+        _rules_cache.clear()
+        _rules_cache['key'] = key
+    return _rules_cache
+
+
+def _invalidate_rules_cache():
+    _rules_cache.clear()
+
 
 def validate_pattern(pattern_str):
     """
@@ -45,6 +62,18 @@ def match_pattern(text, pattern):
     text = text.lower()
     pattern = pattern.lower()
     
+    # Most patterns are plain text with at most a leading/trailing *; test those without regex.
+    # ('.' in the regex doesn't cross newlines, so multi-line text keeps the regex path.)
+    kind, literal = _pattern_kind(pattern)
+    if kind != 'regex' and '\n' not in text:
+        if kind == 'exact':
+            return text == literal
+        if kind == 'prefix':
+            return text.startswith(literal)
+        if kind == 'suffix':
+            return text.endswith(literal)
+        return literal in text
+    
     # Escape special regex characters except *
     regex_pattern = re.escape(pattern).replace(r'\*', '.*')
 
@@ -55,8 +84,40 @@ def match_pattern(text, pattern):
         return False
 
 
+def _pattern_kind(pattern):
+    """
+    Classify a wildcard pattern as 'exact', 'prefix' (foo*), 'suffix' (*foo), 'contains' (*foo*)
+    or 'regex' (a * anywhere else), returning (kind, literal text without the wildcards).
+    """
+    inner = pattern.strip('*')
+    if '*' in inner:
+        return 'regex', pattern
+    starts = pattern.startswith('*')
+    ends = pattern.endswith('*')
+    if starts and ends:
+        return 'contains', inner
+    if starts:
+        return 'suffix', inner
+    if ends:
+        return 'prefix', inner
+    return 'exact', inner
+
+
 def load_mapping_rules():
-    """Load mapping rules from CSV and join with pairs to get full details."""
+    """Load mapping rules from CSV and join with pairs to get full details (cached, returns a copy)."""
+    return _get_cached_rules().copy()
+
+
+def _get_cached_rules():
+    """The joined rules dataframe, read once per version of the mapping files. Do not mutate."""
+    cache = _get_rules_cache()
+    if 'rules' not in cache:
+        cache['rules'] = _read_mapping_rules()
+    return cache['rules']
+
+
+def _read_mapping_rules():
+    """Read mapping rules from CSV and join with pairs to get full details."""
     if not os.path.exists(MAPPING_RULES_FILE):
         return pd.DataFrame(columns=['Rule_ID', 'Pattern', 'Category', 'Sub-Category', 'Direction', 'Priority', 'Is_Wildcard'])
 
@@ -90,9 +151,16 @@ def get_category_subcategory_combinations():
     """
     Get all unique (Category, Sub-Category, Direction) combinations from rules.
     Returns a list of dicts with hierarchy information for UI selection.
+    The result is cached until the mapping files change; treat it as read-only.
     """
-    rules = load_mapping_rules()
-    
+    cache = _get_rules_cache()
+    if 'hierarchy' not in cache:
+        cache['hierarchy'] = _build_hierarchy(_get_cached_rules())
+    return cache['hierarchy']
+
+
+def _build_hierarchy(rules):
+    """Build Category -> [{'sub_category', 'direction'}, ...] from the pairs file (or the rules)."""
     if rules.empty:
         return []
     
@@ -109,11 +177,9 @@ def get_category_subcategory_combinations():
     
     # Build hierarchy: Category -> [(Sub-Category, Direction), ...]
     hierarchy = {}
-    for _, row in combinations.iterrows():
-        cat = row['Category']
-        sub_cat = row['Sub-Category']
-        direction = row['Direction']
-        
+    for cat, sub_cat, direction in zip(combinations['Category'].tolist(),
+                                       combinations['Sub-Category'].tolist(),
+                                       combinations['Direction'].tolist()):
         if cat not in hierarchy:
             hierarchy[cat] = []
         
@@ -137,16 +203,93 @@ def get_subcategories_for_category(category):
 
 def get_direction_for_subcategory(category, sub_category):
     """Get the direction for a specific category + sub-category combination."""
-    hierarchy = get_category_subcategory_combinations()
-    
-    if category not in hierarchy:
-        return None
+    cache = _get_rules_cache()
+    if 'directions' not in cache:
+        # (Category, Sub-Category) -> Direction; the first entry in hierarchy order wins
+        directions = {}
+        hierarchy = get_category_subcategory_combinations()
+        for cat, items in (hierarchy.items() if hierarchy else []):
+            for item in items:
+                directions.setdefault((cat, item['sub_category']), item['direction'])
+        cache['directions'] = directions
     
-    for item in hierarchy[category]:
-        if item['sub_category'] == sub_category:
-            return item['direction']
+    return cache['directions'].get((category, sub_category))
+
+
+# Rules are combined into one alternation regex per this many patterns, which keeps each
+# compiled automaton small enough for large rule sets.
+RULES_PER_REGEX = 500
+
+
+def _rule_regex(pattern):
+    """Anchored regex equivalent to match_pattern() for a (lowercased) transaction."""
+    regex = re.escape(pattern.lower()).replace(r'\*', '.*')
+    return f"^{regex}$"
+
+
+def _first_matching_rule(transactions, regexes):
+    """
+    Return, for each transaction, the index of the first regex in `regexes` that matches
+    its lowercased text (null when none does).
     
-    return None
+    Each batch of regexes is joined into a single alternation with one named group per rule,
+    so a transaction is scanned once per batch instead of once per rule. The regex engine
+    prefers the leftmost alternative, so the first participating group is the first match.
+    """
+    text = transactions.str.to_lowercase().to_frame('_text')
+    batches = []
+    for start in range(0, len(regexes), RULES_PER_REGEX):
+        batch = regexes[start:start + RULES_PER_REGEX]
+        combined = '|'.join(f'(?P<r{i}>{regex})' for i, regex in enumerate(batch))
+        try:
+            groups = text.select(pl.col('_text').str.extract_groups(combined)).unnest('_text')
+            batches.append(groups.select(pl.coalesce([
+                pl.when(pl.col(f'r{i}').is_not_null()).then(pl.lit(start + i, dtype=pl.UInt32))
+                for i in range(len(batch))
+            ])).to_series())
+        except pl.exceptions.PolarsError:
+            # A pattern the combined regex can't compile: test this batch rule by rule, skipping invalid ones
+            matches = text.select([
+                pl.when(pl.col('_text').str.contains(regex, strict=False)).then(pl.lit(start + i, dtype=pl.UInt32)).alias(f'r{i}')
+                for i, regex in enumerate(batch)
+            ])
+            batches.append(matches.select(pl.coalesce(matches.columns)).to_series())
+    return pl.select(pl.coalesce(batches)).to_series()
+
+
+def _transactions_matching(transactions, patterns):
+    """
+    Boolean mask of the transactions (a pandas Series) matching any of `patterns`,
+    equivalent to match_pattern(str(x), pattern) but evaluated over the whole column.
+    """
+    text = pl.Series(transactions.astype(str).tolist(), dtype=pl.String)
+    regexes = [_rule_regex(pattern) for pattern in patterns]
+    return _first_matching_rule(text, regexes).is_not_null().to_numpy()
+
+
+def _get_rule_matcher():
+    """
+    Return (regexes, lookup) for the current mapping rules, built once per version of the mapping files:
+    the anchored rule regexes in match order, and a frame mapping each regex index (_rule_idx)
+    to the rule's _rule_cat, _rule_sub and _rule_dir.
+    """
+    cache = _get_rules_cache()
+    if 'matcher' not in cache:
+        # Sort by Priority ASCENDING (Low -> High), then walk it backwards: rules used to be applied
+        # in ascending order with the last one winning, so that rule is tried first.
+        rules = _get_cached_rules().sort_values('Priority', ascending=True).iloc[::-1]
+        
+        # match_pattern logic: re.escape(pattern).replace(r'\*', '.*'), anchored with ^...$
+        regexes = [_rule_regex(pattern) for pattern in rules['Pattern']]
+        
+        lookup = pl.DataFrame({
+            '_rule_idx': pl.Series(range(len(regexes)), dtype=pl.UInt32),
+            '_rule_cat': rules['Category'].tolist(),
+            '_rule_sub': rules['Sub-Category'].tolist(),
+            '_rule_dir': rules['Direction'].tolist(),
+        }, strict=False)
+        cache['matcher'] = (regexes, lookup)
+    return cache['matcher']
 
 
 def apply_categorization(df, manual_overwrites=None):
@@ -160,6 +303,8 @@ def apply_categorization(df, manual_overwrites=None):
     
     Type is replaced with Direction value from rule (except when Direction='None', 
     in which case original Type is preserved).
+    
+    Pandas wrapper around apply_categorization_pl.
     """
     
     if df.empty:
@@ -172,219 +317,188 @@ def apply_categorization(df, manual_overwrites=None):
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
             
-    # Ensure we have a clean dataframe to start with
-    pl_df = pl.from_pandas(df)
+    return apply_categorization_pl(pl.from_pandas(df), manual_overwrites).to_pandas()
+
+
+def apply_categorization_pl(pl_df, manual_overwrites=None):
+    """
+    Polars version of apply_categorization: takes and returns a pl.DataFrame, so callers that
+    already hold Polars data skip the pandas round-trip. Amount and Balance must be numeric.
+    """
+    
+    if pl_df.is_empty():
+        return pl_df
     
     # Create transaction keys
-    # We use map_elements because create_transaction_key uses hashlib which is not native to Polars expressions yet
-    # But we can optimize by constructing the string in Polars and only hashing in python if needed,
-    # or just use the python function as is since it's one pass.
-    # To match original logic exactly:
+    # Keys are MD5 hashes stored in manual_overwrites.csv, so they are still computed with hashlib,
+    # but over whole columns at once rather than through a per-row struct callback.
     pl_df = pl_df.with_columns(
-        pl.struct(['Transaction Date', 'Bank', 'Account', 'Transaction', 'Amount', 'Balance'])
-        .map_elements(lambda x: create_transaction_key(x), return_dtype=pl.String)
-        .alias('_key')
+        pl.Series('_key', create_transaction_keys(pl_df), dtype=pl.String)
     )
     
-    # Load mapping rules
-    rules = load_mapping_rules()
+    # The rule, amount-override and manual-override steps are chained lazily and collected once,
+    # so the intermediate Category/Sub-Category/Type columns are never materialized
+    lf = pl_df.lazy()
+    
+    # Load mapping rules (regexes in match order plus their category lookup)
+    regexes, lookup = _get_rule_matcher()
     # 1. Apply Rules
-    # Strategy: Apply rules from LOWEST to HIGHEST priority.
-    # This way, higher priority rules overwrite lower priority ones (simulating "first match wins" from the top).
-    if not rules.empty:
-        logger.info(f"Rules to perform: {len(rules)}")
-        # Sort by Priority ASCENDING (Low -> High)
-        rules = rules.sort_values('Priority', ascending=True)
+    # Strategy: the highest priority matching rule wins (see _get_rule_matcher for the ordering).
+    if regexes:
+        logger.info(f"Rules to perform: {len(regexes)}")
+        # Transaction texts repeat a lot (same merchant every month), so match each distinct text once
+        uniq = pl_df.select(pl.col('Transaction').unique())
+        uniq_cat = uniq.with_columns(
+            _first_matching_rule(uniq['Transaction'], regexes).alias('_rule_idx')
+        ).drop_nulls('_rule_idx').join(lookup, on='_rule_idx', how='left')
         
-        # Pre-calculate regex patterns
-        # match_pattern logic: re.escape(pattern).replace(r'\*', '.*')
-        # We can do this in python list comprehension
-        patterns = []
-        for _, rule in rules.iterrows():
-            pat = re.escape(rule['Pattern'].lower()).replace(r'\*', '.*')
-            # Add start/end anchors to match match_pattern logic:
-            # match_pattern uses re.match(f'^{regex_pattern}$', text)
-            # So we need exact match of the pattern (which might contain .*)
-            pat = f"^{pat}$"
-            patterns.append({
-                'regex': pat,
-                'category': rule['Category'],
-                'sub_category': rule['Sub-Category'],
-                'direction': rule.get('Direction', 'None')
-            })
-            
-        # We will build expressions or iterate. Iterating 100-1000 rules is fast enough in Polars.
-        # For very large rule sets, we might want to combine them, but regex matching is the constraint.
-        
-        # We can use a fold or iteration. Iteration is clearer.
-        for rule in patterns:
-            # Condition: Transaction matches pattern            
-            regex = rule['regex']
-            cat = rule['category']
-            sub = rule['sub_category']
-            direction = rule['direction']
-            
-            # Create mask for matching transactions
-            mask = pl.col('Transaction').str.to_lowercase().str.contains(regex, strict=False)
-            
-            pl_df = pl_df.with_columns([
-                pl.when(mask).then(pl.lit(cat)).otherwise(pl.col('Category')).alias('Category'),
-                pl.when(mask).then(pl.lit(sub)).otherwise(pl.col('Sub-Category')).alias('Sub-Category'),
-                pl.when(mask).then(pl.lit(direction)).otherwise(pl.col('Type')).alias('Type')
-            ])
+        matched = pl.col('_rule_idx').is_not_null()
+        lf = lf.join(uniq_cat.lazy(), on='Transaction', how='left', maintain_order='left').with_columns([
+            pl.when(matched).then(pl.col('_rule_cat')).otherwise(pl.col('Category')).alias('Category'),
+            pl.when(matched).then(pl.col('_rule_sub')).otherwise(pl.col('Sub-Category')).alias('Sub-Category'),
+            pl.when(matched).then(pl.col('_rule_dir')).otherwise(pl.col('Type')).alias('Type')
+        ]).drop(['_rule_idx', '_rule_cat', '_rule_sub', '_rule_dir'])
 
     # 2. Apply Amount Overrides
-    amount_overwrites = load_amount_overwrites()
-    if amount_overwrites:
-        logger.info(f"Amount overrides found: {len(amount_overwrites)}")
-        # Convert to DataFrame for joining
-        # Key is (Transaction, Amount)
-        # We need to handle Amount carefully (float).
-        # The original code casts to float.
+    ao_df = load_amount_overwrites_pl()
+    if not ao_df.is_empty():
+        logger.info(f"Amount overrides found: {len(ao_df)}")
+        # Join on Transaction and Amount
+        # We need to ensure types match.
+        # Transaction is string, Amount is float.
         
-        ao_list = []
-        for (trans, amt), val in amount_overwrites.items():
-            ao_list.append({
-                'Transaction': trans,
-                'Amount': amt,
-                'Category_AO': val['Category'],
-                'Sub-Category_AO': val['Sub-Category'],
-                'Direction_AO': val['Direction']
-            })
-            
-        if ao_list:
-            ao_df = pl.DataFrame(ao_list)
-            
-            # Join on Transaction and Amount
-            # We need to ensure types match.
-            # Transaction is string, Amount is float.
-            
-            pl_df = pl_df.join(
-                ao_df, 
-                on=['Transaction', 'Amount'], 
-                how='left'
-            )
-            
-            # Coalesce
-            pl_df = pl_df.with_columns([
-                pl.col('Category_AO').fill_null(pl.col('Category')).alias('Category'),
-                pl.col('Sub-Category_AO').fill_null(pl.col('Sub-Category')).alias('Sub-Category'),
-                pl.col('Direction_AO').fill_null(pl.col('Type')).alias('Type')
-            ]).drop(['Category_AO', 'Sub-Category_AO', 'Direction_AO'])
+        lf = lf.join(
+            ao_df.lazy(), 
+            on=['Transaction', 'Amount'], 
+            how='left',
+            maintain_order='left'
+        )
+        
+        # Coalesce
+        lf = lf.with_columns([
+            pl.col('Category_AO').fill_null(pl.col('Category')).alias('Category'),
+            pl.col('Sub-Category_AO').fill_null(pl.col('Sub-Category')).alias('Sub-Category'),
+            pl.col('Direction_AO').fill_null(pl.col('Type')).alias('Type')
+        ]).drop(['Category_AO', 'Sub-Category_AO', 'Direction_AO'])
 
     # 3. Apply Manual Overrides (Highest Priority)
     if manual_overwrites is None:
-        manual_overwrites = load_manual_overwrites()
+        mo_df = load_manual_overwrites_pl()
+    else:
+        mo_df = manual_overwrites_to_pl(manual_overwrites)
         
-    if manual_overwrites:
-        logger.info(f"Manual overrides found: {len(manual_overwrites)}")
-        # Convert to DataFrame
-        mo_list = []
-        for key, val in manual_overwrites.items():
-            mo_list.append({
-                '_key': key,
-                'Category_MO': val['Category'],
-                'Sub-Category_MO': val['Sub-Category'],
-                'Direction_MO': val['Direction']
-            })
-            
-        if mo_list:
-            mo_df = pl.DataFrame(mo_list)
-            
-            # Join on _key
-            pl_df = pl_df.join(mo_df, on='_key', how='left')
-            
-            # Coalesce
-            pl_df = pl_df.with_columns([
-                pl.col('Category_MO').fill_null(pl.col('Category')).alias('Category'),
-                pl.col('Sub-Category_MO').fill_null(pl.col('Sub-Category')).alias('Sub-Category'),
-                pl.col('Direction_MO').fill_null(pl.col('Type')).alias('Type')
-            ]).drop(['Category_MO', 'Sub-Category_MO', 'Direction_MO'])
+    if not mo_df.is_empty():
+        logger.info(f"Manual overrides found: {len(mo_df)}")
+        # Join on _key
+        lf = lf.join(mo_df.lazy(), on='_key', how='left', maintain_order='left')
+        
+        # Coalesce
+        lf = lf.with_columns([
+            pl.col('Category_MO').fill_null(pl.col('Category')).alias('Category'),
+            pl.col('Sub-Category_MO').fill_null(pl.col('Sub-Category')).alias('Sub-Category'),
+            pl.col('Direction_MO').fill_null(pl.col('Type')).alias('Type')
+        ]).drop(['Category_MO', 'Sub-Category_MO', 'Direction_MO'])
 
-    # Remove internal key column and convert back to Pandas
-    result_df = pl_df.drop('_key').to_pandas()
-    
-    return result_df
+    # Remove internal key column
+    return lf.drop('_key').collect()
 
 
 def add_mapping_rule(pattern, category, sub_category, direction):
     """Add a new mapping rule with Category, Sub-Category, and Direction."""
-    rules = load_mapping_rules() # This loads the joined view
-    
-    # Check if pattern already exists
-    if not rules.empty and (rules['Pattern'].str.lower() == pattern.lower()).any():
-        raise ValueError("Rule with this pattern already exists")
-    
-    # Validate required fields
-    if not pattern or not category or not sub_category or not direction:
-        raise ValueError("Pattern, Category, Sub-Category, and Direction are all required")
-    
-    # Handle Pair_ID logic
-    pair_id = None
-    
+    return add_mapping_rules_bulk([(pattern, category, sub_category, direction)])[0]
+
+
+def add_mapping_rules_bulk(rules_list):
+    """
+    Add several mapping rules with one read and one write of the rules and pairs files.
+    rules_list: iterable of (pattern, category, sub_category, direction) tuples.
+    All rules are validated before anything is written. Returns the new Rule_IDs in order.
+    """
+    # Load raw rules once: used for the duplicate check and to append the new rules
+    if os.path.exists(MAPPING_RULES_FILE):
+        raw_rules = pd.read_csv(MAPPING_RULES_FILE, keep_default_na=False, na_values=['NaN'])
+    else:
+        raw_rules = pd.DataFrame(columns=['Rule_ID', 'Pattern', 'Pair_ID', 'Priority', 'Is_Wildcard'])
+
+    existing_patterns = set(raw_rules['Pattern'].str.lower()) if not raw_rules.empty else set()
+    for pattern, category, sub_category, direction in rules_list:
+        # Check if pattern already exists (in the file or earlier in this batch)
+        if pattern.lower() in existing_patterns:
+            raise ValueError("Rule with this pattern already exists")
+
+        # Validate required fields
+        if not pattern or not category or not sub_category or not direction:
+            raise ValueError("Pattern, Category, Sub-Category, and Direction are all required")
+        existing_patterns.add(pattern.lower())
+
     # Load or create pairs file
     if os.path.exists(MAPPING_PAIRS_FILE):
         pairs_df = pd.read_csv(MAPPING_PAIRS_FILE, keep_default_na=False, na_values=['NaN'])
     else:
         pairs_df = pd.DataFrame(columns=['Pair_ID', 'Category', 'Sub-Category', 'Direction'])
-        
-    # Check if pair exists
-    existing_pair = pairs_df[
-        (pairs_df['Category'] == category) & 
-        (pairs_df['Sub-Category'] == sub_category) & 
-        (pairs_df['Direction'] == direction)
-    ]
-    
-    if not existing_pair.empty:
-        pair_id = existing_pair.iloc[0]['Pair_ID']
-    else:
-        # Create new pair
-        new_pair_id = int(pairs_df['Pair_ID'].max()) + 1 if not pairs_df.empty else 1
-        new_pair = {
-            'Pair_ID': new_pair_id,
-            'Category': category,
-            'Sub-Category': sub_category,
-            'Direction': direction
-        }
-        pairs_df = pd.concat([pairs_df, pd.DataFrame([new_pair])], ignore_index=True)
-        pairs_df.to_csv(MAPPING_PAIRS_FILE, index=False)
-        pair_id = new_pair_id
-    
-    # Calculate priority based on pattern specificity
-    is_wildcard = '*' in pattern
-    priority = len(pattern) if is_wildcard else len(pattern) + 100  # Exact matches higher priority
-    
-    # Reload raw rules file to append new rule (we don't want the joined version for saving)
-    if os.path.exists(MAPPING_RULES_FILE):
-        raw_rules = pd.read_csv(MAPPING_RULES_FILE, keep_default_na=False, na_values=['NaN'])
-    else:
-        raw_rules = pd.DataFrame(columns=['Rule_ID', 'Pattern', 'Pair_ID', 'Priority', 'Is_Wildcard'])
 
-    # Generate new Rule_ID
-    new_id = int(raw_rules['Rule_ID'].max()) + 1 if not raw_rules.empty else 1
-    
-    new_rule = {
-        'Rule_ID': new_id,
-        'Pattern': pattern,
-        'Pair_ID': pair_id,
-        'Priority': priority,
-        'Is_Wildcard': is_wildcard
+    pair_ids = {
+        (row['Category'], row['Sub-Category'], row['Direction']): row['Pair_ID']
+        for row in pairs_df[::-1].to_dict('records')  # reversed so the first matching pair wins
     }
-    
-    raw_rules = pd.concat([raw_rules, pd.DataFrame([new_rule])], ignore_index=True)
-    raw_rules = raw_rules.sort_values('Rule_ID', ascending=True).reset_index(drop=True)
-    raw_rules.to_csv(MAPPING_RULES_FILE, index=False)
-    
-    return new_id
+    next_pair_id = int(pairs_df['Pair_ID'].max()) + 1 if not pairs_df.empty else 1
+    next_rule_id = int(raw_rules['Rule_ID'].max()) + 1 if not raw_rules.empty else 1
+
+    new_pairs = []
+    new_rules = []
+    for pattern, category, sub_category, direction in rules_list:
+        # Handle Pair_ID logic: reuse an existing pair or create a new one
+        pair_id = pair_ids.get((category, sub_category, direction))
+        if pair_id is None:
+            pair_id = next_pair_id
+            next_pair_id += 1
+            pair_ids[(category, sub_category, direction)] = pair_id
+            new_pairs.append({
+                'Pair_ID': pair_id,
+                'Category': category,
+                'Sub-Category': sub_category,
+                'Direction': direction
+            })
+
+        # Calculate priority based on pattern specificity
+        is_wildcard = '*' in pattern
+        priority = len(pattern) if is_wildcard else len(pattern) + 100  # Exact matches higher priority
+
+        new_rules.append({
+            'Rule_ID': next_rule_id,
+            'Pattern': pattern,
+            'Pair_ID': pair_id,
+            'Priority': priority,
+            'Is_Wildcard': is_wildcard
+        })
+        next_rule_id += 1
+
+    if new_pairs:
+        pairs_df = pd.concat([pairs_df, pd.DataFrame(new_pairs)], ignore_index=True)
+        pairs_df.to_csv(MAPPING_PAIRS_FILE, index=False)
+
+    if new_rules:
+        raw_rules = pd.concat([raw_rules, pd.DataFrame(new_rules)], ignore_index=True)
+        raw_rules = raw_rules.sort_values('Rule_ID', ascending=True).reset_index(drop=True)
+        raw_rules.to_csv(MAPPING_RULES_FILE, index=False)
+    _invalidate_rules_cache()
+
+    return [rule['Rule_ID'] for rule in new_rules]
 
 
 def delete_mapping_rule(rule_id):
     """Delete a mapping rule by ID."""
+    delete_mapping_rules_bulk([rule_id])
+
+
+def delete_mapping_rules_bulk(rule_ids):
+    """Delete several mapping rules by ID with one read and one write of the rules file."""
     # Load raw rules to delete
     if os.path.exists(MAPPING_RULES_FILE):
         rules = pd.read_csv(MAPPING_RULES_FILE)
-        rules = rules[rules['Rule_ID'] != rule_id]
+        rules = rules[~rules['Rule_ID'].isin(rule_ids)]
         rules.to_csv(MAPPING_RULES_FILE, index=False)
+        _invalidate_rules_cache()
 
 
 def test_rule(pattern, category, sub_category, direction, consolidated_data=None):
@@ -406,7 +520,7 @@ def test_rule(pattern, category, sub_category, direction, consolidated_data=None
         return pd.DataFrame(), pd.DataFrame()
     
     # Find pattern matches
-    matches = df[df['Transaction'].apply(lambda x: match_pattern(str(x), pattern))]
+    matches = df[_transactions_matching(df['Transaction'], [pattern])]
     
     if matches.empty:
         return pd.DataFrame(), pd.DataFrame()
@@ -445,15 +559,12 @@ def apply_new_rules_list_to_consolidated_data(rules_list):
     if df.empty:
         return
 
-    # Create a combined mask for all rules
-    combined_mask = pd.Series(False, index=df.index)
+    # Create a combined mask for all rules (one combined regex pass over the column)
     logger.info(f"Consolidated data shape before applying rules: {df.shape}")
-    for rule in rules_list:
-        pattern = rule['pattern']
-        
-        rule_mask = df['Transaction'].apply(lambda x: match_pattern(str(x), pattern))
-            
-        combined_mask = combined_mask | rule_mask
+    combined_mask = pd.Series(
+        _transactions_matching(df['Transaction'], [rule['pattern'] for rule in rules_list]),
+        index=df.index
+    )
     
     # Optimization: Only target Uncategorized rows
     combined_mask = combined_mask & (df['Category'] == 'Uncategorized')
@@ -562,6 +673,7 @@ def save_mapping_pairs_bulk(updated_df):
     final_df['Direction'] = final_df['Direction'].replace('', 'None')
     
     final_df.to_csv(MAPPING_PAIRS_FILE, index=False)
+    _invalidate_rules_cache()
     return True
 
 
@@ -656,5 +768,6 @@ def save_rules_bulk(updated_pair_rules_df, pair_id):
     # Sort and save
     final_rules_df = final_rules_df.sort_values('Rule_ID')
     final_rules_df.to_csv(MAPPING_RULES_FILE, index=False)
+    _invalidate_rules_cache()
     
     return True
@@ -4,23 +4,113 @@ Handles combining, deduplicating, and applying categorization to transactions.
 Includes support for non-transaction (balance-based) accounts with transfer capture and synthetic transaction generation.
 """
 import pandas as pd
+import polars as pl
 import os
-from .transaction_keys import create_transaction_key
-from .categorization import apply_categorization
-from .file_management import FILES_SUMMARY_FILE, parse_multiple_files, update_file_summary
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from .transaction_keys import KEY_COLUMNS
+from .categorization import apply_categorization, MAPPING_RULES_FILE, MAPPING_PAIRS_FILE
+from .file_management import DATA_DIR, FILES_SUMMARY_FILE, RAW_FILES_DIR, parse_multiple_files, resolve_file_paths, update_file_summary, get_files_fingerprint
+from .manual_overrides import MANUAL_OVERWRITES_FILE, AMOUNT_OVERWRITES_FILE
 from .non_transaction_logic import get_captured_transactions, get_synthetic_transactions, transfer_transactions_to_fake_accounts
+from .non_transaction_logic import BANK_MAPPING_FILE, BALANCE_ENTRIES_FILE
+from .raw_file_reader import RawFileReader
 from .logger import get_logger
-from .file_management import load_consolidated_data
+from .file_management import load_consolidated_data, CONSOLIDATED_FILE, LEGACY_CONSOLIDATED_FILE
 
 logger = get_logger()
 
+# Files each pipeline stage reads, besides its input dataframe.
+# Used to build cache keys so a stage only re-runs when one of them changes.
+# files_summary.csv is keyed on its content instead (see get_stage_fingerprint).
+STAGE_INPUT_FILES = {
+    'ingest': [RAW_FILES_DIR, os.path.join('config', 'file_signatures.yaml')],
+    'map': [MAPPING_RULES_FILE, MAPPING_PAIRS_FILE, MANUAL_OVERWRITES_FILE, AMOUNT_OVERWRITES_FILE],
+    'synthesize': [BANK_MAPPING_FILE, BALANCE_ENTRIES_FILE],
+    'load': [CONSOLIDATED_FILE, LEGACY_CONSOLIDATED_FILE],
+}
+
+# Raw rows of the last ingest, plus the fingerprint of the files behind each Bank+Account group.
+# An incremental ingest reuses a group's cached rows instead of re-parsing its files.
+RAW_CACHE_FILE = os.path.join(DATA_DIR, 'raw_transactions_cache.parquet')
+RAW_CACHE_INDEX_FILE = os.path.join(DATA_DIR, 'raw_transactions_cache.json')
+
+
+def _get_files_summary_digest():
+    """
+    Digest of the File Name/Bank/Account columns of the files summary.
+    The mtime can't be used here: ingest rewrites the Processed flag on every run.
+    """
+    if not os.path.exists(FILES_SUMMARY_FILE):
+        return None
+    summary_df = pd.read_csv(FILES_SUMMARY_FILE, usecols=['File Name', 'Bank', 'Account']).astype(str)
+    rows = sorted(summary_df.itertuples(index=False, name=None))
+    return hashlib.md5(repr(rows).encode('utf-8')).hexdigest()
+
+def get_stage_fingerprint(stage):
+    """Fingerprint of the files read by a pipeline stage ('ingest', 'map' or 'synthesize')."""
+    fingerprint = get_files_fingerprint(STAGE_INPUT_FILES[stage])
+    if stage == 'ingest':
+        fingerprint += (_get_files_summary_digest(),)
+    return fingerprint
+
+def get_dataframe_fingerprint(df):
+    """
+    Fingerprint of a transactions dataframe, used as a cache key instead of Streamlit hashing the frame.
+    Combines the columns with an MD5 of the vectorized per-row hashes of every column, in row order.
+    """
+    if df is None or df.empty:
+        return (0,)
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return (len(df), tuple(df.columns), hashlib.md5(row_hashes.tobytes()).hexdigest())
+
+
+def _get_group_key(bank, account):
+    return f"{bank}\x1f{account}"
+
+def _get_group_signature(file_names, paths, file_signature):
+    """
+    Identify the inputs of a Bank+Account group: its file names (in order), the (path, mtime, size)
+    of each file and its entry in file_signatures.yaml (columns mapping, date format, skiprows...).
+    """
+    file_signature = json.dumps(file_signature, sort_keys=True, default=str)
+    return repr((list(file_names), get_files_fingerprint(paths), file_signature))
+
+def _load_raw_cache():
+    """Return (raw rows, {group key: signature}) of the last ingest, or (None, {}) if there is no usable cache."""
+    if not (os.path.exists(RAW_CACHE_FILE) and os.path.exists(RAW_CACHE_INDEX_FILE)):
+        return None, {}
+    try:
+        with open(RAW_CACHE_INDEX_FILE, 'r', encoding='utf-8') as f:
+            signatures = json.load(f)
+        return pd.read_parquet(RAW_CACHE_FILE, engine='pyarrow'), signatures
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable raw transactions cache: {e}")
+        return None, {}
+
+def _save_raw_cache(raw_df, signatures):
+    """Persist the raw rows of this ingest and the signature of each group they came from."""
+    try:
+        # The index is written last, so an interrupted save leaves it missing or stale
+        # (and a stale signature never matches the files again)
+        temp_file = RAW_CACHE_FILE + ".tmp"
+        raw_df.to_parquet(temp_file, engine='pyarrow', compression='zstd', index=False)
+        os.replace(temp_file, RAW_CACHE_FILE)
+        with open(RAW_CACHE_INDEX_FILE, 'w', encoding='utf-8') as f:
+            json.dump(signatures, f)
+    except Exception as e:
+        logger.warning(f"Could not save raw transactions cache: {e}")
+        if os.path.exists(RAW_CACHE_INDEX_FILE):
+            os.remove(RAW_CACHE_INDEX_FILE)
 
 def ingest_transactions(incremental=False):
     """
     Step 1: Ingest raw files.
-    Reads raw files from disk.
-    If incremental=True, only reads files not already in the summary (TODO: implement incremental logic fully).
-    Currently reads all files as per original logic, but returns the raw dataframe.
+    Reads raw files from disk and returns the raw dataframe.
+    If incremental=True, a Bank+Account group whose files are all marked Processed and unchanged
+    on disk reuses its rows from the last ingest; every other group is parsed again.
+    Groups are reused or re-parsed as a whole, since duplicates are dropped across the files of a group.
     """
     logger.info("Step 1: Ingesting transactions...")
     consolidated_columns = ['Bank', 'Account', 'Transaction Date', 'Effective Date', 'Transaction', 'Type', 'Amount', 'Balance', 'Category', 'Sub-Category', 'Source_File', 'Source_RowNo', 'Transaction_Source']
@@ -29,24 +119,56 @@ def ingest_transactions(incremental=False):
     # Read files summary
     files_summary_df = pd.read_csv(FILES_SUMMARY_FILE)
     grouped_files = files_summary_df.groupby(['Bank', 'Account'])['File Name'].apply(list).reset_index(name='FileNames')
+    if 'Processed' in files_summary_df.columns:
+        processed_flags = files_summary_df['Processed'].astype(str).str.lower() == 'yes'
+    else:
+        processed_flags = pd.Series(False, index=files_summary_df.index)
+    unprocessed_names = set(files_summary_df.loc[~processed_flags, 'File Name'])
 
     # Track which files were actually processed
     processed_files = []
     
-    # TODO: Implement true incremental loading here by filtering out already processed files
-    # For now, we follow the original pattern of reading everything defined in the summary
-    
-    for index, row in grouped_files.iterrows():
+    groups = grouped_files.to_dict('records')
+    signatures = {}
+    reader = RawFileReader()
+    for row in groups:
+        row['Paths'] = resolve_file_paths(row['FileNames'])
+        file_signature = reader.get_signature(row['Bank'], row['Account'])
+        signatures[_get_group_key(row['Bank'], row['Account'])] = _get_group_signature(row['FileNames'], row['Paths'], file_signature)
+
+    cached_df, cached_signatures = _load_raw_cache() if incremental else (None, {})
+    cached_groups = {}
+    if cached_df is not None:
+        cached_by_group = dict(list(cached_df.groupby(['Bank', 'Account'], sort=False)))
+        for row in groups:
+            key = _get_group_key(row['Bank'], row['Account'])
+            if cached_signatures.get(key) != signatures[key] or unprocessed_names.intersection(row['FileNames']):
+                continue
+            group_df = cached_by_group.get((row['Bank'], row['Account']))
+            cached_groups[key] = group_df if group_df is not None else cached_df.iloc[0:0]
+        logger.info(f"Reusing cached rows for {len(cached_groups)} of {len(groups)} Bank+Account groups")
+
+    def parse_group(row):
+        key = _get_group_key(row['Bank'], row['Account'])
+        if key in cached_groups:
+            return cached_groups[key]
         logger.info(f"{row['Bank']} {row['Account']} - Reading files: { row['FileNames'] }")
-        all_dfs.append(parse_multiple_files(row['FileNames'], row['Bank'], row['Account']))
-        # Track these files as processed
-        processed_files.extend(row['FileNames'])
+        return parse_multiple_files(row['Paths'], row['Bank'], row['Account'])
+    
+    # Bank+Account groups are independent, so they are parsed concurrently; map() keeps the group order
+    if groups:
+        with ThreadPoolExecutor(max_workers=min(os.cpu_count() or 1, len(groups))) as executor:
+            all_dfs = list(executor.map(parse_group, groups))
+        for row in groups:
+            # Track these files as processed
+            processed_files.extend(row['FileNames'])
     
     if not all_dfs:
         return pd.DataFrame(columns=consolidated_columns)
     
     # Concatenate all dataframes
-    raw_df = pd.concat(all_dfs, ignore_index=True)
+    raw_df = pd.concat(all_dfs, ignore_index=True, copy=False)
+    _save_raw_cache(raw_df, signatures)
     
     # Update Processed flag ONLY for files that were actually read
     files_summary_df.loc[files_summary_df['File Name'].isin(processed_files), 'Processed'] = 'Yes'
@@ -92,36 +214,42 @@ def synthesize_transactions(df):
     # Generate captured transactions for exceptional transaction accounts
     logger.info("Generating captured transactions...")
     captured_df = get_captured_transactions(master_df)
+    # Frames appended to master_df, concatenated once at the end
+    new_frames = []
     
     if not captured_df.empty:
         logger.info(f"Generated {len(captured_df)} captured transactions")
-        # Ensure all columns match
-        for col in master_df.columns:
-            if col not in captured_df.columns:
-                captured_df[col] = None
-        master_df = pd.concat([master_df, captured_df], ignore_index=True)
+        # Ensure all columns match (added in one assign rather than inserted one by one;
+        # reindex would fill them with float NaN instead of None and change the column dtypes)
+        captured_df = captured_df.assign(**dict.fromkeys(master_df.columns.difference(captured_df.columns, sort=False)))
+        new_frames.append(captured_df)
     
     # Generate synthetic balance-adjustment transactions
+    # (they are computed from captured rows only, so the full frame isn't needed yet)
     logger.info("Generating synthetic transactions...")
-    synthetic_df = get_synthetic_transactions(master_df)
+    captured_rows = master_df[master_df['Transaction_Source'] == 'Captured']
+    synthetic_df = get_synthetic_transactions(pd.concat([captured_rows] + new_frames, ignore_index=True, copy=False))
     
     if not synthetic_df.empty:
         logger.info(f"Generated {len(synthetic_df)} synthetic transactions before deduplication")
         # Ensure all columns match
-        for col in master_df.columns:
-            if col not in synthetic_df.columns:
-                synthetic_df[col] = None
+        synthetic_df = synthetic_df.assign(**dict.fromkeys(master_df.columns.difference(synthetic_df.columns, sort=False)))
         
-        # Deduplicate synthetic transactions by key fields
-        synthetic_df['_key'] = synthetic_df.apply(create_transaction_key, axis=1)
-        synthetic_df = synthetic_df.drop_duplicates(subset='_key', keep='first')
-        synthetic_df = synthetic_df.drop('_key', axis=1)
+        # Deduplicate synthetic transactions by key fields (the columns behind create_transaction_key;
+        # comparing them directly avoids building and re-hashing an MD5 string per row)
+        synthetic_df = synthetic_df.drop_duplicates(subset=KEY_COLUMNS, keep='first')
         
         logger.info(f"Generated {len(synthetic_df)} synthetic transactions after deduplication")
-        master_df = pd.concat([master_df, synthetic_df], ignore_index=True)
+        new_frames.append(synthetic_df)
+    
+    if new_frames:
+        master_df = pd.concat([master_df] + new_frames, ignore_index=True, copy=False)
     
-    # Sort by transaction date
-    master_df = master_df.sort_values('Transaction Date', ascending=False)
+    # Sort by transaction date (datetime64, so the sort runs natively; stable so equal dates
+    # keep their ingest order between runs)
+    if not pd.api.types.is_datetime64_any_dtype(master_df['Transaction Date']):
+        master_df['Transaction Date'] = pd.to_datetime(master_df['Transaction Date'], errors='coerce', cache=True)
+    master_df = master_df.sort_values('Transaction Date', ascending=False, kind='stable')
     
     logger.info(f"Synthesis complete. Final DF shape: {master_df.shape}")
     return master_df
@@ -130,20 +258,30 @@ def extract_distinct_uncategorized_transactions(df=None):
     """Extract all distinct transaction values where category == 'Uncategorized'."""
     if df is None:
         logger.info("Extracting distinct uncategorized transactions...")
-        df = load_consolidated_data()
+        # Only read the columns and rows this summary needs
+        df = load_consolidated_data(columns=['Transaction', 'Transaction Date', 'Amount', 'Category'],
+                                    filters=[('Category', '==', 'Uncategorized')])
     
     
     if df.empty:
         return pd.DataFrame(columns=['transaction'])
     
-    uncategorized = df[df['Category'] == 'Uncategorized'].copy()
+    uncategorized = df.loc[df['Category'] == 'Uncategorized', ['Transaction', 'Transaction Date', 'Amount']]
     
     if uncategorized.empty:
         return pd.DataFrame(columns=['transaction'])
     # Get counts, max dates, and avg amounts for distinct transactions
-    result = uncategorized.groupby('Transaction').agg({
-        'Transaction Date': ['count', 'max'],
-        'Amount': 'mean'
-    }).reset_index()
-    result.columns = ['transaction', 'count', 'max_date', 'avg_amount']
-    return result
+    # (hash aggregation in Polars; sorted and without a null group, like pandas groupby)
+    result = (
+        pl.from_pandas(uncategorized)
+        .drop_nulls('Transaction')
+        .group_by('Transaction')
+        .agg([
+            pl.col('Transaction Date').count().cast(pl.Int64).alias('count'),
+            pl.col('Transaction Date').max().alias('max_date'),
+            pl.col('Amount').mean().alias('avg_amount'),
+        ])
+        .sort('Transaction')
+        .rename({'Transaction': 'transaction'})
+    )
+    return result.to_pandas()
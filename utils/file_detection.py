@@ -7,26 +7,47 @@ which parsing signature should be used.
 import pandas as pd
 import os
 import yaml
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Tuple, Optional, List
-from .file_management import read_bank_mapping
+from .file_management import read_bank_mapping, get_files_fingerprint
+from .raw_file_reader import read_excel_with_fallback
 from .logger import get_logger
 
 logger = get_logger()
 
 CONFIG_PATH = 'config/file_signatures.yaml'
 
+# Upper bound on threads used to detect a batch of uploaded files
+MAX_DETECT_WORKERS = 32
+
+# Parsed signatures, reused until the YAML file changes on disk (keyed on its fingerprint)
+_signatures_cache = {}
+
 def load_signatures():
-    """Load signatures from YAML configuration."""
+    """Load signatures from YAML configuration (cached until the file changes; treat as read-only)."""
     path = CONFIG_PATH
     if not os.path.exists(path):
         if os.path.exists(os.path.join('..', path)):
             path = os.path.join('..', path)
         else:
             return []
-            
-    with open(path, 'r') as f:
-        data = yaml.safe_load(f)
-        return data.get('signatures', [])
+    
+    key = get_files_fingerprint([path])
+    if _signatures_cache.get('key') != key:
+        with open(path, 'r') as f:
+            data = yaml.safe_load(f)
+        signatures = data.get('signatures', [])
+        for sig in signatures:
+            # Normalized once here instead of for every file checked against the signature
+            sig['_required_lower'] = _normalize_columns(sig.get('required_columns', []))
+        _signatures_cache['key'] = key
+        _signatures_cache['signatures'] = signatures
+    return _signatures_cache['signatures']
+
+
+def _normalize_columns(columns) -> Tuple[str, ...]:
+    """Lowercased, stripped column names, as compared by check_column_match."""
+    return tuple(str(col).lower().strip() for col in columns)
 
 def read_file_header(file_path: str, skiprows: int = 0, usecols: Optional[str] = None, 
                      max_rows: int = 5) -> Optional[pd.DataFrame]:
@@ -39,8 +60,15 @@ def read_file_header(file_path: str, skiprows: int = 0, usecols: Optional[str] =
         if file_ext in ['.xls', '.xlsx']:
             # Note: usecols in signature might be string "A:E" or list.
             # pd.read_excel supports string "A:E".
-            df = pd.read_excel(file_path, sheet_name=0, skiprows=skiprows, 
-                             usecols=usecols, nrows=max_rows)
+            # For .xlsx, openpyxl streams the sheet in read-only mode and stops after nrows,
+            # while calamine loads the whole sheet first; for a header sniff openpyxl is much faster.
+            if file_ext == '.xlsx':
+                df = pd.read_excel(file_path, sheet_name=0, skiprows=skiprows,
+                                   usecols=usecols, nrows=max_rows, engine='openpyxl')
+            else:
+                # Same calamine -> default engine fallback as the full read, so detection agrees with it
+                df = read_excel_with_fallback(file_path, sheet_name=0, skiprows=skiprows,
+                                              usecols=usecols, nrows=max_rows)
         elif file_ext == '.csv':
             df = pd.read_csv(file_path, skiprows=skiprows, usecols=usecols, nrows=max_rows)
         else:
@@ -57,8 +85,8 @@ def check_column_match(file_columns: List[str], required_columns: List[str],
     """
     Check if file has the required columns.
     """
-    file_cols_lower = [str(col).lower().strip() for col in file_columns]
-    required_lower = [str(col).lower().strip() for col in required_columns]
+    file_cols_lower = list(_normalize_columns(file_columns))
+    required_lower = list(_normalize_columns(required_columns))
     
     if strict:
         # Exact match: same columns, same count, same order
@@ -70,89 +98,75 @@ def check_column_match(file_columns: List[str], required_columns: List[str],
         return file_cols_lower == required_lower
     else:
         # Subset match: all required columns must be present
-        return all(col in file_cols_lower for col in required_lower)
+        return set(file_cols_lower).issuperset(required_lower)
 
 
-def detect_bank_account_pair(file_path: str) -> Optional[Tuple[str, str, float]]:
+def _get_signatures_by_extension() -> Dict[str, List[Dict]]:
     """
-    Detect the Bank+Account pair for a file by analyzing its structure.
+    Signatures of the Bank+Account pairs enabled for transactions in the bank mapping,
+    indexed by file extension (each list keeps the YAML order).
     """
-    file_ext = os.path.splitext(file_path)[1].lower()
-    
-    signatures = load_signatures()
-    
     # Get enabled bank/accounts from mapping
     mapping_df = read_bank_mapping()
     enabled_pairs = set()
-    for _, row in mapping_df.iterrows():
-        if row.get('Input') == 'Transactions':
-            enabled_pairs.add((row['Bank'], row['Account']))
-    
-    best_match = None
+    if 'Input' in mapping_df.columns:
+        enabled = mapping_df[mapping_df['Input'] == 'Transactions']
+        enabled_pairs = set(zip(enabled['Bank'], enabled['Account']))
     
-    for sig in signatures:
-        bank = sig.get('bank')
-        account = sig.get('account')
-        
+    by_extension = {}
+    for sig in load_signatures():
         # Check if this bank/account is enabled in the app
-        if (bank, account) not in enabled_pairs:
+        if (sig.get('bank'), sig.get('account')) not in enabled_pairs:
             continue
+        for ext in dict.fromkeys(sig.get('file_extensions', [])):
+            by_extension.setdefault(ext, []).append(sig)
+    return by_extension
 
-        # STRICT CHECK 1: File extension
-        if file_ext not in sig.get('file_extensions', []):
-            continue
+
+def detect_bank_account_pair(file_path: str) -> Optional[Tuple[str, str, float]]:
+    """
+    Detect the Bank+Account pair for a file by analyzing its structure.
+    """
+    return _detect_with_signatures(file_path, _get_signatures_by_extension())
+
+
+def _detect_with_signatures(file_path: str, signatures_by_ext: Dict[str, List[Dict]]) -> Optional[Tuple[str, str, float]]:
+    """Detect the Bank+Account pair for a file against pre-indexed signatures."""
+    file_ext = os.path.splitext(file_path)[1].lower()
+    # Signatures with the same skiprows see the same header, so the file is read once per skiprows value
+    headers_cache = {}
+    
+    # STRICT CHECK 1: File extension (only signatures listing it are indexed under it)
+    for sig in signatures_by_ext.get(file_ext, []):
+        bank = sig.get('bank')
+        account = sig.get('account')
         
         # Try to read file header
         skiprows = sig.get('skiprows', 0)
-        # Note: 'usecols' logic in read_excel is tricky with varying columns.
-        # Best to read all columns and check if required ones are present.
-        # But previous logic used 'usecols' string from signature. 
-        # My YAML doesn't have 'usecols' string (like "A:E") anymore, it has 'required_columns'.
-        # So I will read without usecols restriction to see what's in the file.
+        # All columns are read; the signature's required_columns are checked against them below
         
-        df_header = read_file_header(
-            file_path,
-            skiprows=skiprows
-        )
+        if skiprows not in headers_cache:
+            df_header = read_file_header(
+                file_path,
+                skiprows=skiprows
+            )
+            # Keep the normalized header names with the header, so they are computed once per read
+            file_cols = set(_normalize_columns(df_header.columns)) if df_header is not None else None
+            headers_cache[skiprows] = (df_header, file_cols)
+        df_header, file_cols = headers_cache[skiprows]
         
         if df_header is None or df_header.empty:
             continue
         
-        required_cols = sig.get('required_columns', [])
-        if not required_cols:
+        required_lower = sig['_required_lower']
+        if not required_lower:
             continue
         
-        # STRICT CHECK 2: Column count and names
-        # Previous logic was very strict: check_column_match(..., strict=True)
-        # which meant df.columns MUST be exactly required_columns.
-        # If I read without usecols, df might have extra columns.
-        # I should check if the required columns are present.
-        # If strict matching is desired, I should check if the first N columns match?
-        # Or if the set matches?
-        
-        # Let's use subset matching for robustness, or strict if the file format is rigid.
-        # The legacy code was strict. Let's try to be accurate.
-        # If I read all columns, I can check if the detected columns *contain* the required ones in order?
-        # Or just use subset match.
-        
-        columns_match = check_column_match(
-            df_header.columns.tolist(), 
-            required_cols,
-            strict=False # Relaxing to False to allow extra columns if present, unless strict is needed. 
-            # But wait, original code was strict=True.
-            # If I want to maintain strictness, I need to know if the file should ONLY have these columns.
-        )
-        
-        # Let's refine strictness:
-        # If the file format uses rigid column positions (e.g. A:E), we expect those columns.
-        # If I read the file, I get all columns.
-        # If required_columns matches the first N columns of the file, that's a good match.
-        
-        # Let's try exact match on the available columns.
-        # If I filter the file columns to only those in required, do they match?
+        # STRICT CHECK 2: subset match, equivalent to check_column_match(..., strict=False) on the precomputed names
+        columns_match = file_cols.issuperset(required_lower)
         
         if columns_match:
-             return (bank, account, 1.0)
+            return (bank, account, 1.0)
     
     return None
 
@@ -161,10 +175,14 @@ def detect_all_files(file_paths: List[str]) -> Dict[str, Optional[Tuple[str, str
     """
     Detect Bank+Account pairs for multiple files.
     """
-    results = {}
-    for file_path in file_paths:
-        results[file_path] = detect_bank_account_pair(file_path)
-    return results
+    if not file_paths:
+        return {}
+    # Signatures and the bank mapping are read once for the whole batch
+    signatures_by_ext = _get_signatures_by_extension()
+    # Detection is mostly file reads, so files are sniffed concurrently; map() keeps the input order
+    with ThreadPoolExecutor(max_workers=min(MAX_DETECT_WORKERS, len(file_paths))) as executor:
+        detected = executor.map(lambda file_path: _detect_with_signatures(file_path, signatures_by_ext), file_paths)
+        return dict(zip(file_paths, detected))
 
 
 def get_module_signature_info(bank: str, account: str) -> Optional[Dict]:
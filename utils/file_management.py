@@ -5,6 +5,7 @@ Handles Excel file parsing, metadata extraction, and file deletion.
 import pandas as pd
 import os
 import shutil
+import threading
 from datetime import datetime
 from .raw_file_reader import RawFileReader
 from .logger import get_logger
@@ -13,30 +14,46 @@ logger = get_logger()
 
 DATA_DIR = "data"
 RAW_FILES_DIR = os.path.join(DATA_DIR, "raw_files")
-CONSOLIDATED_FILE = os.path.join(DATA_DIR, "consolidated_transactions.csv")
+CONSOLIDATED_FILE = os.path.join(DATA_DIR, "consolidated_transactions.parquet")
+LEGACY_CONSOLIDATED_FILE = os.path.join(DATA_DIR, "consolidated_transactions.csv")
 FILES_SUMMARY_FILE = os.path.join(DATA_DIR, "files_summary.csv")
 BANK_MAPPING_FILE = os.path.join(DATA_DIR, "bank_mapping.csv")
 
+# Serializes writes of CONSOLIDATED_FILE (concurrent sessions may save at the same time)
+_save_lock = threading.Lock()
+
 # Ensure directories exist
 os.makedirs(RAW_FILES_DIR, exist_ok=True)
 os.makedirs(DATA_DIR, exist_ok=True)
 
+# Parsed bank mapping, reused until the file changes on disk (keyed on its fingerprint)
+_bank_mapping_cache = {}
+
+def _load_bank_mapping():
+    """Return the cached bank mapping entry, re-reading the CSV only when it changed."""
+    key = get_files_fingerprint([BANK_MAPPING_FILE])
+    if _bank_mapping_cache.get('key') != key:
+        df = pd.read_csv(BANK_MAPPING_FILE)
+        transaction_rows = df[df['Input'] == 'Transactions']
+        transaction_pairs = list(zip(transaction_rows['Bank'], transaction_rows['Account']))
+        accounts_by_bank = {}
+        for bank, account in transaction_pairs:
+            accounts_by_bank.setdefault(bank, []).append(account)
+        _bank_mapping_cache.update(key=key, df=df, transaction_pairs=transaction_pairs, accounts_by_bank=accounts_by_bank)
+    return _bank_mapping_cache
+
 def get_transaction_capable_banks():
     """
     Get list of banks/accounts that can have files uploaded (Input='Transactions').
     """
-    df = pd.read_csv(BANK_MAPPING_FILE)
-    transaction_rows = df[df['Input'] == 'Transactions']
-    return list(zip(transaction_rows['Bank'], transaction_rows['Account']))
+    return list(_load_bank_mapping()['transaction_pairs'])
 
 
 def get_accounts_for_bank(bank):
     """
     Get list of accounts for a specific bank that support file uploads.
     """
-    df = pd.read_csv(BANK_MAPPING_FILE)
-    transaction_rows = df[(df['Input'] == 'Transactions') & (df['Bank'] == bank)]
-    return transaction_rows['Account'].tolist()
+    return list(_load_bank_mapping()['accounts_by_bank'].get(bank, []))
 
 
 def write_raw_file(uploaded_file, bank):
@@ -64,13 +81,11 @@ def write_raw_file(uploaded_file, bank):
     logger.info(f"File saved: {output_path}")
     return output_path
 
-def parse_multiple_files(file_list, bank, account):
+def resolve_file_paths(file_list):
     """
-    Parse multiple files for a Bank+Account using RawFileReader.
+    Resolve the files summary names of a Bank+Account to paths on disk.
+    Missing files are logged and left out.
     """
-    reader = RawFileReader()
-        
-    # Let's resolve valid paths.
     valid_paths = []
     for f in file_list:
         if os.path.exists(f):
@@ -86,8 +101,14 @@ def parse_multiple_files(file_list, bank, account):
                      valid_paths.append(os.path.abspath(os.path.basename(f)))
                 else: 
                      logger.warning(f"Warning: File not found {f}")
+    return valid_paths
 
-    df = reader.read_files(valid_paths, bank, account)
+def parse_multiple_files(file_list, bank, account):
+    """
+    Parse multiple files for a Bank+Account using RawFileReader.
+    """
+    reader = RawFileReader()
+    df = reader.read_files(resolve_file_paths(file_list), bank, account)
     return df
 
 def parse_excel_file(file_path, bank, account, temp=False):
@@ -128,21 +149,65 @@ def parse_excel_file(file_path, bank, account, temp=False):
 
     return df, df_file_summary
 
-def load_consolidated_data():
-    """Load consolidated transactions from CSV."""
+def load_consolidated_data(columns=None, filters=None):
+    """
+    Load consolidated transactions from Parquet (falls back to the legacy CSV).
+    columns/filters are pushed down to the Parquet reader, e.g.
+    filters=[('Category', '==', 'Uncategorized')], so only the needed data is read.
+    """
     if os.path.exists(CONSOLIDATED_FILE):
-        df = pd.read_csv(CONSOLIDATED_FILE,keep_default_na=False,na_values=['NaN'])
-        df['Transaction Date'] = pd.to_datetime(df['Transaction Date'])
-        df['Effective Date'] = pd.to_datetime(df['Effective Date'])
+        # Parquet keeps the column types, so no date re-parsing is needed
+        df = pd.read_parquet(CONSOLIDATED_FILE, engine='pyarrow', columns=columns, filters=filters)
         logger.info(f"Loaded {len(df)} transactions from consolidated file")
         return df
-    return pd.DataFrame(columns=['Transaction Date', 'Bank', 'Account', 'Transaction', 'Type', 
+    if os.path.exists(LEGACY_CONSOLIDATED_FILE):
+        df = pd.read_csv(LEGACY_CONSOLIDATED_FILE,keep_default_na=False,na_values=['NaN'])
+        df['Transaction Date'] = pd.to_datetime(df['Transaction Date'])
+        df['Effective Date'] = pd.to_datetime(df['Effective Date'])
+        # keep_default_na=False leaves blanks as '' strings; restore numeric types before migrating
+        for col in ['Amount', 'Balance', 'Source_RowNo']:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col].replace('', pd.NA), errors='coerce')
+        logger.info(f"Loaded {len(df)} transactions from legacy consolidated CSV")
+        # Migrate so subsequent loads use the Parquet file
+        save_consolidated_data(df)
+        return load_consolidated_data(columns=columns, filters=filters)
+    return pd.DataFrame(columns=columns or ['Transaction Date', 'Bank', 'Account', 'Transaction', 'Type', 
                                  'Amount', 'Effective Date', 'Balance', 'Category', 'Sub-Category', 'Source_File'])
 
 def save_consolidated_data(df):
-    """Save consolidated data to CSV."""
+    """Save consolidated data to Parquet."""
     logger.info(f"Saving consolidated data")
-    df.to_csv(CONSOLIDATED_FILE, index=False)
+    # Write to a temp file and swap it in, so readers never see a partial file
+    with _save_lock:
+        temp_file = CONSOLIDATED_FILE + ".tmp"
+        df.to_parquet(temp_file, engine='pyarrow', compression='zstd', index=False)
+        os.replace(temp_file, CONSOLIDATED_FILE)
+
+def get_files_fingerprint(paths):
+    """
+    Build a cheap fingerprint of files on disk, suitable as a cache key.
+    Directories are walked recursively; missing paths are skipped.
+    Returns a sorted tuple of (path, mtime, size).
+    """
+    entries = []
+    for path in paths:
+        if os.path.isdir(path):
+            _scan_dir_fingerprint(path, entries)
+        elif os.path.exists(path):
+            stat = os.stat(path)
+            entries.append((path, stat.st_mtime, stat.st_size))
+    return tuple(sorted(entries))
+
+def _scan_dir_fingerprint(dir_path, entries):
+    """Append (path, mtime, size) for every file under dir_path; one stat per file via os.scandir."""
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                _scan_dir_fingerprint(entry.path, entries)
+            elif entry.is_file():
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_mtime, stat.st_size))
 
 def get_uploaded_files_info():
     """Get information about uploaded files from files_summary.csv."""
@@ -182,8 +247,8 @@ def delete_uploaded_file(filename):
     return deleted
 
 def read_bank_mapping():
-    """Read bank mapping file."""
-    return pd.read_csv(BANK_MAPPING_FILE)
+    """Read bank mapping file (cached until it changes; returns a copy the caller may modify)."""
+    return _load_bank_mapping()['df'].copy()
 
 def update_file_summary(df, replace=False):
     try:
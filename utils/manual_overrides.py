@@ -4,61 +4,145 @@ Handles storing, loading, and removing manual categorization overwrites.
 Supports Category + Sub-Category + Direction combinations.
 """
 import pandas as pd
+import polars as pl
 import os
+import csv
+import threading
 from datetime import datetime
 from .transaction_keys import create_transaction_key
+from .file_management import get_files_fingerprint
 
 MANUAL_OVERWRITES_FILE = os.path.join("data", "manual_overwrites.csv")
+MANUAL_OVERWRITES_COLUMNS = ['Transaction_Key', 'Category', 'Sub-Category', 'Direction', 'Override_Date']
+
+# Override lookup frames used by categorization, keyed by file path and rebuilt when the
+# file's (path, mtime, size) fingerprint changes; the writers below also drop their entry.
+_overwrites_pl_cache = {}
+
+
+def _get_cached_frame(path, build):
+    """Return the cached frame for `path`, calling build() if the file changed since it was made."""
+    key = get_files_fingerprint([path])
+    cached = _overwrites_pl_cache.get(path)
+    if cached is None or cached[0] != key:
+        cached = (key, build())
+        _overwrites_pl_cache[path] = cached
+    return cached[1]
+
+
+# Serializes access to the overrides files: appends, rewrites and compaction, and the loaders'
+# reads, so no reader sees a half-rewritten file. Reentrant, since compaction loads then saves.
+_overwrites_lock = threading.RLock()
+
+# (rows, distinct keys) of each overrides file as last loaded or saved, plus rows appended since.
+# The add functions compact a file once more than half of its rows are superseded.
+_overwrites_row_counts = {}
+
+
+def _needs_compaction(path):
+    """Whether most rows of the file are superseded by later appends (unknown until it was loaded or saved)."""
+    rows, keys = _overwrites_row_counts.get(path, (0, 0))
+    return rows > 2 * keys
+
+
+def _append_override_row(path, columns, row):
+    """
+    Append one override row to the file instead of rewriting it; loaders keep the last row per key.
+    Returns False when the file is missing or has a different header, so the caller rewrites it instead.
+    Call with _overwrites_lock held.
+    """
+    if not os.path.exists(path):
+        return False
+    with open(path, 'r', newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f), None)
+    if header != columns:
+        return False
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        needs_newline = f.read(1) not in (b'\n', b'\r')
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        # '\n' like DataFrame.to_csv, which rewrites these files
+        if needs_newline:
+            f.write('\n')
+        csv.writer(f, lineterminator='\n').writerow([row[col] for col in columns])
+    _overwrites_pl_cache.pop(path, None)
+    if path in _overwrites_row_counts:
+        rows, keys = _overwrites_row_counts[path]
+        _overwrites_row_counts[path] = (rows + 1, keys)
+    return True
 
 
 def load_manual_overwrites():
     """Load manual overwrites from CSV."""
-    if os.path.exists(MANUAL_OVERWRITES_FILE):
+    with _overwrites_lock:
+        if not os.path.exists(MANUAL_OVERWRITES_FILE):
+            return {}
         df = pd.read_csv(MANUAL_OVERWRITES_FILE,keep_default_na=False,na_values=['NaN'])
-        # Ensure required columns exist
-        required_cols = ['Transaction_Key', 'Category', 'Sub-Category', 'Direction', 'Override_Date']
-        for col in required_cols:
-            if col not in df.columns:
-                df[col] = ''
-        return df.set_index('Transaction_Key').to_dict('index')
-    return {}
+    # Ensure required columns exist
+    for col in MANUAL_OVERWRITES_COLUMNS:
+        if col not in df.columns:
+            df[col] = ''
+    # Updates are appended to the file, so the last row of a key wins
+    rows = len(df)
+    df = df.drop_duplicates(subset='Transaction_Key', keep='last')
+    _overwrites_row_counts[MANUAL_OVERWRITES_FILE] = (rows, len(df))
+    return df.set_index('Transaction_Key').to_dict('index')
+
+
+def manual_overwrites_to_pl(overwrites):
+    """Manual overwrites dict as a Polars lookup frame (_key, Category_MO, Sub-Category_MO, Direction_MO)."""
+    return pl.DataFrame([
+        {
+            '_key': key,
+            'Category_MO': val['Category'],
+            'Sub-Category_MO': val['Sub-Category'],
+            'Direction_MO': val['Direction']
+        }
+        for key, val in overwrites.items()
+    ])
+
+
+def load_manual_overwrites_pl():
+    """Manual overwrites as a Polars lookup frame, cached until the overwrites file changes."""
+    return _get_cached_frame(MANUAL_OVERWRITES_FILE, lambda: manual_overwrites_to_pl(load_manual_overwrites()))
 
 
 def add_manual_override(transaction_key, category, sub_category, direction):
     """Add or update manual override with Category, Sub-Category, and Direction."""
-    overwrites = load_manual_overwrites()
-    
-    overwrites[transaction_key] = {
+    row = {
+        'Transaction_Key': transaction_key,
         'Category': category,
         'Sub-Category': sub_category,
         'Direction': direction,
         'Override_Date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
-    
-    df = pd.DataFrame([
-        {
-            'Transaction_Key': k,
-            'Category': v['Category'],
-            'Sub-Category': v['Sub-Category'],
-            'Direction': v['Direction'],
-            'Override_Date': v['Override_Date']
-        }
-        for k, v in overwrites.items()
-    ])
-    
-    df.to_csv(MANUAL_OVERWRITES_FILE, index=False)
+    with _overwrites_lock:
+        if _append_override_row(MANUAL_OVERWRITES_FILE, MANUAL_OVERWRITES_COLUMNS, row):
+            if _needs_compaction(MANUAL_OVERWRITES_FILE):
+                _save_manual_overwrites(load_manual_overwrites())
+            return
+        
+        overwrites = load_manual_overwrites()
+        overwrites[transaction_key] = {col: row[col] for col in MANUAL_OVERWRITES_COLUMNS[1:]}
+        _save_manual_overwrites(overwrites)
 
 
 def remove_manual_override(transaction_key):
     """Remove a manual override."""
-    overwrites = load_manual_overwrites()
-    
-    if transaction_key in overwrites:
-        del overwrites[transaction_key]
-    
+    with _overwrites_lock:
+        overwrites = load_manual_overwrites()
+        
+        if transaction_key in overwrites:
+            del overwrites[transaction_key]
+        
+        _save_manual_overwrites(overwrites)
+
+
+def _save_manual_overwrites(overwrites):
+    """Save manual overwrites to CSV, one row per key."""
     if not overwrites:
         # If no overwrites left, save empty file with headers
-        df = pd.DataFrame(columns=['Transaction_Key', 'Category', 'Sub-Category', 'Direction', 'Override_Date'])
+        df = pd.DataFrame(columns=MANUAL_OVERWRITES_COLUMNS)
     else:
         df = pd.DataFrame([
             {
@@ -71,41 +155,64 @@ def remove_manual_override(transaction_key):
             for k, v in overwrites.items()
         ])
     
-    df.to_csv(MANUAL_OVERWRITES_FILE, index=False)
+    with _overwrites_lock:
+        df.to_csv(MANUAL_OVERWRITES_FILE, index=False)
+        _overwrites_pl_cache.pop(MANUAL_OVERWRITES_FILE, None)
+        _overwrites_row_counts[MANUAL_OVERWRITES_FILE] = (len(overwrites), len(overwrites))
 
 
 AMOUNT_OVERWRITES_FILE = os.path.join("data", "amount_overwrites.csv")
+AMOUNT_OVERWRITES_COLUMNS = ['Transaction', 'Amount', 'Category', 'Sub-Category', 'Direction', 'Override_Date']
 
 
 def load_amount_overwrites():
     """Load amount-based overwrites from CSV."""
-    if os.path.exists(AMOUNT_OVERWRITES_FILE):
+    with _overwrites_lock:
+        if not os.path.exists(AMOUNT_OVERWRITES_FILE):
+            return {}
         df = pd.read_csv(AMOUNT_OVERWRITES_FILE, keep_default_na=False, na_values=['NaN'])
-        # Ensure required columns exist
-        required_cols = ['Transaction', 'Amount', 'Category', 'Sub-Category', 'Direction', 'Override_Date']
-        for col in required_cols:
-            if col not in df.columns:
-                df[col] = ''
-        
-        # Create a dictionary keyed by (Transaction, Amount)
-        # Note: Amount should be handled carefully (float vs string), but assuming exact match for now
-        overwrites = {}
-        for _, row in df.iterrows():
-            key = (str(row['Transaction']), float(row['Amount']) if row['Amount'] else 0.0)
-            overwrites[key] = {
-                'Category': row['Category'],
-                'Sub-Category': row['Sub-Category'],
-                'Direction': row['Direction'],
-                'Override_Date': row['Override_Date']
+    # Ensure required columns exist
+    for col in AMOUNT_OVERWRITES_COLUMNS:
+        if col not in df.columns:
+            df[col] = ''
+    
+    # Create a dictionary keyed by (Transaction, Amount)
+    # Note: Amount should be handled carefully (float vs string), but assuming exact match for now
+    # Updates are appended to the file, so the last row of a key wins
+    overwrites = {}
+    for trans, amount, category, sub_category, direction, override_date in zip(*(df[col].tolist() for col in AMOUNT_OVERWRITES_COLUMNS)):
+        key = (str(trans), float(amount) if amount else 0.0)
+        overwrites[key] = {
+            'Category': category,
+            'Sub-Category': sub_category,
+            'Direction': direction,
+            'Override_Date': override_date
+        }
+    _overwrites_row_counts[AMOUNT_OVERWRITES_FILE] = (len(df), len(overwrites))
+    return overwrites
+
+
+def load_amount_overwrites_pl():
+    """
+    Amount overwrites as a Polars lookup frame (Transaction, Amount, Category_AO, Sub-Category_AO,
+    Direction_AO), cached until the overwrites file changes.
+    """
+    def build():
+        return pl.DataFrame([
+            {
+                'Transaction': trans,
+                'Amount': amt,
+                'Category_AO': val['Category'],
+                'Sub-Category_AO': val['Sub-Category'],
+                'Direction_AO': val['Direction']
             }
-        return overwrites
-    return {}
+            for (trans, amt), val in load_amount_overwrites().items()
+        ])
+    return _get_cached_frame(AMOUNT_OVERWRITES_FILE, build)
 
 
 def add_amount_override(transaction, amount, category, sub_category, direction):
     """Add or update manual override based on Transaction + Amount."""
-    overwrites = load_amount_overwrites()
-    
     # Ensure amount is float for consistency
     try:
         amount_val = float(amount)
@@ -113,21 +220,27 @@ def add_amount_override(transaction, amount, category, sub_category, direction):
         amount_val = 0.0
         
     key = (str(transaction), amount_val)
-    
-    overwrites[key] = {
+    row = {
+        'Transaction': key[0],
+        'Amount': amount_val,
         'Category': category,
         'Sub-Category': sub_category,
         'Direction': direction,
         'Override_Date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
-    
-    _save_amount_overwrites(overwrites)
+    with _overwrites_lock:
+        if _append_override_row(AMOUNT_OVERWRITES_FILE, AMOUNT_OVERWRITES_COLUMNS, row):
+            if _needs_compaction(AMOUNT_OVERWRITES_FILE):
+                _save_amount_overwrites(load_amount_overwrites())
+            return
+        
+        overwrites = load_amount_overwrites()
+        overwrites[key] = {col: row[col] for col in AMOUNT_OVERWRITES_COLUMNS[2:]}
+        _save_amount_overwrites(overwrites)
 
 
 def remove_amount_override(transaction, amount):
     """Remove an amount-based override."""
-    overwrites = load_amount_overwrites()
-    
     try:
         amount_val = float(amount)
     except (ValueError, TypeError):
@@ -135,15 +248,17 @@ def remove_amount_override(transaction, amount):
         
     key = (str(transaction), amount_val)
     
-    if key in overwrites:
-        del overwrites[key]
-        _save_amount_overwrites(overwrites)
+    with _overwrites_lock:
+        overwrites = load_amount_overwrites()
+        if key in overwrites:
+            del overwrites[key]
+            _save_amount_overwrites(overwrites)
 
 
 def _save_amount_overwrites(overwrites):
     """Save amount overwrites to CSV."""
     if not overwrites:
-        df = pd.DataFrame(columns=['Transaction', 'Amount', 'Category', 'Sub-Category', 'Direction', 'Override_Date'])
+        df = pd.DataFrame(columns=AMOUNT_OVERWRITES_COLUMNS)
     else:
         data_list = []
         for (trans, amt), v in overwrites.items():
@@ -157,4 +272,7 @@ def _save_amount_overwrites(overwrites):
             })
         df = pd.DataFrame(data_list)
     
-    df.to_csv(AMOUNT_OVERWRITES_FILE, index=False)
+    with _overwrites_lock:
+        df.to_csv(AMOUNT_OVERWRITES_FILE, index=False)
+        _overwrites_pl_cache.pop(AMOUNT_OVERWRITES_FILE, None)
+        _overwrites_row_counts[AMOUNT_OVERWRITES_FILE] = (len(overwrites), len(overwrites))
@@ -1,11 +1,43 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
 import yaml
 import os
-from typing import List, Dict, Optional, Tuple, Union
+import string
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Optional, Tuple, Union, Iterable, Iterator
 from .logger import get_logger
 
 logger = get_logger()
 
+# Upper bound on threads used to parse the files of one Bank+Account
+MAX_READ_WORKERS = 8
+
+ARROW_ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError)
+
+# Prefer the Rust-backed calamine engine (reads both .xls and .xlsx) when installed;
+# None lets pandas fall back to openpyxl/xlrd
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_ENGINE = None
+
+
+def read_excel_with_fallback(file_path: str, **kwargs) -> pd.DataFrame:
+    """
+    pd.read_excel with EXCEL_ENGINE, retrying with pandas' default engine (openpyxl/xlrd)
+    for workbooks calamine can't decode.
+    """
+    if EXCEL_ENGINE is None:
+        return pd.read_excel(file_path, **kwargs)
+    try:
+        return pd.read_excel(file_path, engine=EXCEL_ENGINE, **kwargs)
+    except Exception as e:
+        logger.warning(f"{EXCEL_ENGINE} could not read {file_path}, retrying with the default engine: {e}")
+        return pd.read_excel(file_path, **kwargs)
+
 class RawFileReader:
     def __init__(self, config_path: str = 'config/file_signatures.yaml'):
         self.config_path = config_path
@@ -51,26 +83,16 @@ class RawFileReader:
         # Final column selection
         standard_cols = ['Bank', 'Account', 'Transaction Date', 'Effective Date', 'Transaction', 'Type', 'Amount', 'Balance', 'Category', 'Sub-Category', 'Source_File', 'Source_RowNo']
 
-        dfs = []
-        for file_path in file_paths:
-            try:
-                df = self._read_single_file(file_path, signature)
-                if df is not None:
-                    dfs.append(df)
-            except Exception as e:
-                logger.error(f"Error reading {file_path}: {e}")
-                
-        if not dfs:
+        # Concatenate all, consuming per-file frames as they are parsed
+        combined_df = self._concat_frames(self.iter_files(file_paths, signature))
+        if combined_df is None:
             return pd.DataFrame(columns=standard_cols)
-            
-        # Concatenate all
-        combined_df = pd.concat(dfs, ignore_index=True)
+
         logger.info(f"Rows before deduplication: {len(combined_df)}")
         # Deduplication Strategy: Keep duplicates within the same file but remove across files  
         dedup_cols = ['Transaction Date', 'Effective Date', 'Transaction', 'Amount', 'Balance']
-        first_file_per_combination = combined_df.groupby(dedup_cols)['Source_File'].first()
-        combined_df['FirstFile'] = combined_df.set_index(dedup_cols).index.map(first_file_per_combination)
-        combined_df = combined_df[combined_df['Source_File'] == combined_df['FirstFile']].drop('FirstFile', axis=1).reset_index(drop=True)
+        first_file = combined_df.groupby(dedup_cols)['Source_File'].transform('first')
+        combined_df = combined_df[combined_df['Source_File'] == first_file].reset_index(drop=True)
         logger.info(f"Rows after deduplication: {len(combined_df)}")
         
         # Add metadata
@@ -78,7 +100,7 @@ class RawFileReader:
         combined_df['Account'] = account
         
         # Add derivative columns
-        combined_df['Type'] = combined_df['Amount'].apply(lambda x: 'In' if x > 0 else 'Out')
+        combined_df['Type'] = np.where(combined_df['Amount'].to_numpy() > 0, 'In', 'Out')
         combined_df['Category'] = 'Uncategorized'
         combined_df['Sub-Category'] = 'Uncategorized'
         
@@ -89,15 +111,132 @@ class RawFileReader:
                 
         return combined_df[standard_cols]
 
+    def iter_files(self, file_paths: List[str], signature: Dict) -> Iterator[pd.DataFrame]:
+        """
+        Yield the parsed frame of each readable file, in input order.
+        Files are independent, so they are parsed concurrently; map() keeps the input order,
+        which the cross-file deduplication in read_files relies on.
+        """
+        if not file_paths:
+            return
+        max_workers = min(MAX_READ_WORKERS, len(file_paths))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for df in executor.map(partial(self._read_single_file_safe, signature=signature), file_paths):
+                if df is not None:
+                    yield df
+
+    def _concat_frames(self, frames: Iterable[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """
+        Concatenate per-file frames through Arrow: concat_tables only stitches column chunks together,
+        instead of pandas re-boxing and reconciling every column. Each frame is converted as it arrives,
+        so the pandas copies don't all stay alive until the end. Falls back to pd.concat when the
+        frames can't be expressed in a common Arrow schema (e.g. mixed-type object columns).
+        Returns None if there are no frames.
+        """
+        tables = []
+        pending = []  # once Arrow rejects a frame, the rest are concatenated by pandas
+        for df in frames:
+            if not pending:
+                try:
+                    tables.append(pa.Table.from_pandas(df, preserve_index=False))
+                    continue
+                except ARROW_ERRORS as e:
+                    logger.debug(f"Arrow conversion not possible, using pd.concat: {e}")
+            pending.append(df)
+
+        if not tables and not pending:
+            return None
+        if not pending:
+            try:
+                return self._arrow_to_pandas(pa.concat_tables(tables, promote_options='permissive'))
+            except ARROW_ERRORS as e:
+                logger.debug(f"Arrow concat not possible, using pd.concat: {e}")
+        return pd.concat([self._arrow_to_pandas(table) for table in tables] + pending, ignore_index=True)
+
+    def _arrow_to_pandas(self, table: pa.Table) -> pd.DataFrame:
+        """Convert an Arrow table back with pandas semantics (see _normalize_arrow_frame)."""
+        return self._normalize_arrow_frame(table.to_pandas())
+
+    def _normalize_arrow_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Give a frame that came through Arrow the types of pandas' default readers:
+        NaN (not None) for missing text, nanosecond datetimes.
+        """
+        for col in df.columns:
+            if df[col].dtype == object:
+                df[col] = df[col].where(df[col].notna(), np.nan)
+            elif pd.api.types.is_datetime64_any_dtype(df[col]):
+                df[col] = df[col].astype('datetime64[ns]')
+        return df
+
+    def _get_source_columns(self, signature: Dict) -> List[str]:
+        """Source columns referenced by the signature's mapping (direct names and template fields)."""
+        columns = []
+        for source_val in signature.get('columns_mapping', {}).values():
+            if not isinstance(source_val, str):
+                continue
+            if '{' in source_val and '}' in source_val:
+                columns.extend(field for _, field, _, _ in string.Formatter().parse(source_val) if field)
+            else:
+                columns.append(source_val)
+        return list(dict.fromkeys(columns))
+
+    def _read_csv(self, file_path: str, skiprows: int, usecols: List[str]) -> pd.DataFrame:
+        """
+        Read only the mapped columns of a CSV with the pyarrow parser.
+        Falls back to the default parser if the projection fails (e.g. a constant mapping that isn't a column).
+        """
+        try:
+            df = pd.read_csv(file_path, skiprows=skiprows, usecols=usecols, engine='pyarrow')
+        except (ValueError, KeyError) as e:
+            logger.debug(f"pyarrow CSV read failed for {file_path}, using default parser: {e}")
+            return pd.read_csv(file_path, skiprows=skiprows)
+
+        # Match the default parser
+        return self._normalize_arrow_frame(df)
+
+    def _build_constructed_column(self, df: pd.DataFrame, template: str) -> pd.Series:
+        """
+        Build a column from a template like "{Concepto} | {Observaciones}".
+        Equivalent to formatting the template row by row, but done with one vectorized str.cat.
+        """
+        parts = list(string.Formatter().parse(template))
+        if any(spec or conversion for _, field, spec, conversion in parts if field is not None):
+            # Format specs/conversions need the per-row path
+            return df.apply(lambda x: template.format(**x.to_dict()), axis=1)
+
+        pieces = []
+        for literal, field, _, _ in parts:
+            if literal:
+                pieces.append(pd.Series(literal, index=df.index))
+            if field is not None:
+                column = df[field]
+                if pd.api.types.is_datetime64_any_dtype(column):
+                    # Match str(Timestamp), which always includes the time part
+                    column = column.astype(object)
+                pieces.append(column.astype(str))
+        return pieces[0].str.cat(pieces[1:])
+
+    def _read_single_file_safe(self, file_path: str, signature: Dict) -> Optional[pd.DataFrame]:
+        """Read a single file, logging and skipping it on error."""
+        try:
+            return self._read_single_file(file_path, signature)
+        except Exception as e:
+            logger.error(f"Error reading {file_path}: {e}")
+            return None
+
     def _read_single_file(self, file_path: str, signature: Dict) -> Optional[pd.DataFrame]:
         """Read a single file and apply transformations."""
         ext = os.path.splitext(file_path)[1].lower()
         skiprows = signature.get('skiprows', 0)
         
+        # Only materialize the columns the mapping actually uses
+        source_cols = self._get_source_columns(signature)
         if ext in ['.xls', '.xlsx']:
-            df = pd.read_excel(file_path, skiprows=skiprows)
+            needed = set(source_cols)
+            df = read_excel_with_fallback(file_path, skiprows=skiprows, usecols=lambda col: col in needed)
         elif ext == '.csv':
-            df = pd.read_csv(file_path, skiprows=skiprows)
+            df = self._read_csv(file_path, skiprows, source_cols)
         else:
             logger.warning(f"Unsupported file extension: {ext}")
             return None
@@ -111,8 +250,7 @@ class RawFileReader:
             try:
                 # 1. Check for Constructed Column (contains {})
                 if isinstance(source_val, str) and '{' in source_val and '}' in source_val:
-                     # Using apply with format
-                     df[target_col] = df.apply(lambda x: source_val.format(**x.to_dict()), axis=1)
+                     df[target_col] = self._build_constructed_column(df, source_val)
                 
                 # 2. Check for 1-to-1 Mapping (source_val is a column name)
                 elif source_val in source_columns:
@@ -128,11 +266,12 @@ class RawFileReader:
         date_format = signature.get('date_format')
         date_cols = ['Transaction Date', 'Effective Date']
         for col in date_cols:
-            if col in df.columns:
+            # Excel date cells already come back as datetimes; only parse text columns
+            if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
                 if date_format:
-                     df[col] = pd.to_datetime(df[col], format=date_format, errors='coerce')
+                     df[col] = pd.to_datetime(df[col], format=date_format, errors='coerce', cache=True)
                 else:
-                     df[col] = pd.to_datetime(df[col], errors='coerce')
+                     df[col] = pd.to_datetime(df[col], errors='coerce', cache=True)
 
         # Keep Target columns only
         df = df[list(mapping.keys())]
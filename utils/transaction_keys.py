@@ -4,8 +4,23 @@ Used for deduplication and cross-referencing across modules.
 """
 import hashlib
 
+KEY_COLUMNS = ['Transaction Date', 'Bank', 'Account', 'Transaction', 'Amount', 'Balance']
+
 
 def create_transaction_key(row):
     """Create MD5 hash key for a transaction."""
     key_str = f"{row['Transaction Date']}{row['Bank']}{row['Account']}{row['Transaction']}{row['Amount']}{row['Balance']}"
     return hashlib.md5(key_str.encode()).hexdigest()
+
+
+def create_transaction_keys(df):
+    """
+    Create the create_transaction_key() MD5 key for every row of a pandas or Polars dataframe.
+    Reads each key column once instead of building a row object per transaction.
+    """
+    md5 = hashlib.md5
+    columns = [df[col].to_list() for col in KEY_COLUMNS]
+    return [
+        md5(f"{date}{bank}{account}{transaction}{amount}{balance}".encode()).hexdigest()
+        for date, bank, account, transaction, amount, balance in zip(*columns)
+    ]
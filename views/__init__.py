@@ -2,13 +2,24 @@
 Views package for Finance Analyzer application.
 
 This package contains modular UI components for each tab of the Streamlit application.
+View modules are imported on first attribute access, so importing one view
+does not pull in every other view (and its plotting dependencies).
 """
+import importlib
 
-from .upload_files import render_upload_files_tab
-from .file_management import render_file_management_tab
-from .mapping import render_mapping_tab
-from .manual_overwrite import render_manual_overwrite_tab
-from .dashboard import render_dashboard_tab
+_LAZY_EXPORTS = {
+    "render_upload_files_tab": "upload_files",
+    "render_file_management_tab": "file_management",
+    "render_mapping_tab": "mapping",
+    "render_manual_overwrite_tab": "manual_overwrite",
+    "render_dashboard_tab": "dashboard",
+}
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        module = importlib.import_module(f".{_LAZY_EXPORTS[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     "render_upload_files_tab",
@@ -15,15 +15,11 @@ def render_dashboard_v2_tab():
     """Render the Dashboard tab (v2)."""
     st.header("📊 Dashboard v2")
     
-    consolidated_df = st.session_state.consolidated_df.copy()
+    # The merge returns a new frame, so the session dataframe is never copied or mutated here
+    consolidated_df = st.session_state.consolidated_df
     logger.debug(f"Consolidated df shape: {consolidated_df.shape}")
     bank_mapping_df = read_bank_mapping()
-    bank_mapping_df['Bank_Account_key'] = bank_mapping_df['Bank'] + ' ' + bank_mapping_df['Account']
-    consolidated_df['Bank_Account_key'] = consolidated_df['Bank'] + ' ' + consolidated_df['Account']
-    logger.debug(f"Consolidated df shape: {consolidated_df.shape}")
-    consolidated_df = pd.merge(consolidated_df, bank_mapping_df[['Bank_Account_key', 'Owner']], how='left', on='Bank_Account_key')
-    logger.debug(f"Consolidated df shape: {consolidated_df.shape}")
-    consolidated_df = consolidated_df.drop(columns=['Bank_Account_key'])
+    consolidated_df = pd.merge(consolidated_df, bank_mapping_df[['Bank', 'Account', 'Owner']], how='left', on=['Bank', 'Account'])
     logger.debug(f"Consolidated df shape: {consolidated_df.shape}")
     del bank_mapping_df
     
@@ -74,7 +70,7 @@ def render_dashboard_v2_tab():
         }
         
         # Base dataframe for filter options (all unique combinations)
-        filters_base_df = consolidated_df[['Owner', 'Bank', 'Account', 'Category', 'Sub-Category']].drop_duplicates().copy()
+        filters_base_df = consolidated_df[['Owner', 'Bank', 'Account', 'Category', 'Sub-Category']].drop_duplicates()
         
         # Render cascading filters
         with col7:
@@ -2,7 +2,7 @@ import streamlit as st
 import pandas as pd
 from utils import (
     load_manual_overwrites, remove_manual_override,
-    create_transaction_key, add_manual_override,
+    create_transaction_keys, add_manual_override,
     get_category_subcategory_combinations, get_subcategories_for_category,
     get_direction_for_subcategory
 )
@@ -18,8 +18,9 @@ def render_manual_overwrite_tab():
     consolidated_df = st.session_state.consolidated_df
     
     if not consolidated_df.empty:
-        # Add transaction key for reference
-        consolidated_df['_key'] = consolidated_df.apply(create_transaction_key, axis=1)
+        # Add transaction key for reference (assign returns a new frame; the session
+        # dataframe may be a shared cached object and must not be mutated)
+        consolidated_df = consolidated_df.assign(_key=create_transaction_keys(consolidated_df))
         
         # Search filter
         search_term = st.text_input("🔍 Search transactions", placeholder="Filter by transaction name...")
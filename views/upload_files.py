@@ -287,6 +287,7 @@ def render_upload_files_tab():
     # HANDLE UPLOAD
     if upload_clicked:
         try:
+            uploaded_summaries = []
             for file in uploaded_file:
                 # Get summary from dict
                 df_file_summary = st.session_state.preview_summaries.get(file.name)
@@ -306,21 +307,24 @@ def render_upload_files_tab():
                 with open(file_path, 'wb') as f:
                     f.write(file.getbuffer())
                 
-                # Set file path in summary and update
+                # Set file path in summary; summaries are written once after the loop
                 df_file_summary["File Name"] = file_path
-                update_file_summary(df_file_summary)
+                uploaded_summaries.append(df_file_summary)
+            
+            if uploaded_summaries:
+                update_file_summary(pd.concat(uploaded_summaries, ignore_index=True))
             
             # Clean up ALL temp files after successful upload
             temp_dir = os.path.join(RAW_FILES_DIR, 'temp')
             if os.path.exists(temp_dir):
-                for temp_file in os.listdir(temp_dir):
-                    temp_file_path = os.path.join(temp_dir, temp_file)
-                    try:
-                        if os.path.isfile(temp_file_path):
-                            os.remove(temp_file_path)
-                            logger.info(f"Deleted temp file: {temp_file_path}")
-                    except Exception as temp_error:
-                        logger.warning(f"Could not delete temp file {temp_file}: {temp_error}")
+                with os.scandir(temp_dir) as temp_entries:
+                    for temp_entry in temp_entries:
+                        try:
+                            if temp_entry.is_file():
+                                os.remove(temp_entry.path)
+                                logger.info(f"Deleted temp file: {temp_entry.path}")
+                        except Exception as temp_error:
+                            logger.warning(f"Could not delete temp file {temp_entry.name}: {temp_error}")
             
             # Clear preview and file uploader state
             st.session_state.show_preview = False